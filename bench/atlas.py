@@ -0,0 +1,92 @@
+import sys
+import time
+
+from core import TextureAtlas, ObjectBaseAtlas, Tileset
+from components import *
+
+from bench.common import report
+from bench.loading import make_atlas
+
+
+def make_filenames(count: int) -> list[str]:
+    filenames = []
+    for index in range(count // 8):
+        for frame in range(4):
+            filenames.append("floor_{}_anim_f{}.png".format(index, frame))
+            filenames.append("big_{}_idle_anim_f{}.png".format(index, frame))
+    while len(filenames) < count:
+        filenames.append("wall_{}.png".format(len(filenames)))
+    return filenames
+
+
+# previous implementations: linear scans over every texture / object
+def legacy_texture_add(atlas: TextureAtlas, filename: str, texture_id: int):
+    parts = filename.split('_')
+    if len(parts) >= 3 and parts[-1].startswith('f') and parts[-2].lower() == 'anim':
+        name = "_".join(parts[:-2])
+        for texture in atlas.textures:
+            if texture.name == name:
+                texture.textures.append(texture_id)
+                texture.textures_names.append(filename)
+                return
+    atlas.add(filename, texture_id)
+
+
+def legacy_find(atlas: ObjectBaseAtlas, classbase, name: str):
+    for obj in atlas.objects:
+        if isinstance(obj, classbase) and obj.name == name:
+            return obj
+
+
+def legacy_from_instance(atlas: ObjectBaseAtlas, classbase):
+    return [obj for obj in atlas.objects if isinstance(obj, classbase)]
+
+
+def timed(func, count: int) -> float:
+    start_time = time.perf_counter()
+    for index in range(count):
+        func(index)
+    return (time.perf_counter() - start_time) / count * 1000000
+
+
+def run(count: int = 10000, lookups: int = 2000) -> dict:
+    filenames = make_filenames(count)
+
+    legacy_textures = TextureAtlas()
+    legacy_add = timed(lambda index: legacy_texture_add(legacy_textures, filenames[index], index), count)
+
+    textures = TextureAtlas()
+    add = timed(lambda index: textures.add(filenames[index], index), count)
+
+    atlas = make_atlas()
+    build = timed(lambda index: atlas.add(textures.textures[index]), len(textures.textures))
+    atlas.build()
+
+    names = [(type(obj), obj.name) for obj in atlas.objects]
+    legacy_lookup = timed(lambda index: legacy_find(atlas, *names[-1 - index % len(names)]), lookups)
+    lookup = timed(lambda index: atlas.find(*names[-1 - index % len(names)]), lookups)
+
+    legacy_instances = timed(lambda index: legacy_from_instance(atlas, Tileset), lookups // 10)
+    instances = timed(lambda index: atlas.from_instance(Tileset), lookups)
+
+    return {
+        "textures": count,
+        "objects": len(atlas.objects),
+        "legacy_texture_add_us": legacy_add,
+        "texture_add_us": add,
+        "object_add_us": build,
+        "legacy_lookup_us": legacy_lookup,
+        "lookup_us": lookup,
+        "legacy_from_instance_us": legacy_instances,
+        "from_instance_us": instances
+    }
+
+
+def main(args):
+    count = int(args[0]) if len(args) > 0 else 10000
+    report("atlas ({} textures)".format(count), run(count))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
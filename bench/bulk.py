@@ -0,0 +1,93 @@
+import gc
+import math
+import os
+import sys
+import tempfile
+import time
+
+from BTP.BTP import *
+from components import Wall, Floor
+from map import MapBase, ChunkData, TileData, Chunk, MapFile
+from utility import TILE_SIZE
+
+from bench.common import BenchWin, report
+from bench.prototypes import make_atlas
+
+
+# generated while the file is written, a 1M tiles map never exists as TileData
+def iter_chunks(width: int, height: int):
+    for cy in range(height):
+        for cx in range(width):
+            chunk = ChunkData()
+            chunk.position = Chunk.from_key((cx, cy))
+            for i in range(Chunk.DEFAULT_SIZE ** 2):
+                tile = TileData()
+                tile.object = Wall if i % 6 == 0 else Floor
+                tile.name = "wall_mid" if i % 6 == 0 else ("floor_spikes" if i % 7 == 0 else "floor_1")
+                tile.position = chunk.position + Vec(i % Chunk.DEFAULT_SIZE, i // Chunk.DEFAULT_SIZE) * TILE_SIZE
+                tile.flip = Vec(-1, 1) if i % 5 == 0 else Vec(1)
+                tile.collision = i % 6 == 0
+                chunk.tiles.append(tile)
+            yield chunk
+
+
+# previous load path: TileData objects, one atlas lookup and one tiles tuple rebuild per tile
+def load_legacy(map_base: MapBase, map_file: MapFile) -> int:
+    tiles = 0
+    for key in map_file.keys():
+        data = map_file.read_chunk(key)
+        chunk = map_base.setup_chunk(Chunk(map_base.btp, map_base.atlas, data.position))
+        for tile in sorted(data.tiles, key=lambda tile: tile.layer):
+            obj_tile = map_base.atlas.spawn(tile.object, tile.name, tile.position, tile.flip, tile.collision)
+            if obj_tile is not None:
+                chunk.place_tile(obj_tile)
+        tiles += len(chunk.tiles)
+    return tiles
+
+
+def load_bulk(map_base: MapBase, map_file: MapFile, workers: int) -> int:
+    map_base.builder.clear()
+    return sum(len(chunk.tiles) for chunk in map_base.builder.load(map_file, map_file.keys(), workers))
+
+
+def timed(func, *args) -> tuple[float, int]:
+    gc.collect()
+    start_time = time.perf_counter()
+    tiles = func(*args)
+    return time.perf_counter() - start_time, tiles
+
+
+def run(tiles: int = 1_000_000, workers: int = 4) -> dict:
+    size = math.ceil(math.sqrt(tiles / Chunk.DEFAULT_SIZE ** 2))
+    map_base = MapBase(BenchWin(), make_atlas())
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench" + MapFile.EXTENSION)
+        MapFile.write_chunks(path, iter_chunks(size, size))
+
+        with MapFile(path, MapFile.get_types(map_base.atlas)) as map_file:
+            legacy, legacy_tiles = timed(load_legacy, map_base, map_file)
+            bulk, bulk_tiles = timed(load_bulk, map_base, map_file, 0)
+            pool, pool_tiles = timed(load_bulk, map_base, map_file, workers)
+
+    return {
+        "chunks": size * size,
+        "tiles": bulk_tiles,
+        "same_tiles": legacy_tiles == bulk_tiles == pool_tiles,
+        "legacy_s": legacy,
+        "bulk_s": bulk,
+        "bulk_pool_s": pool,
+        "workers": workers,
+        "cpus": os.cpu_count(),
+        "speedup": legacy / bulk if bulk != 0 else 0
+    }
+
+
+def main(args):
+    tiles = int(args[0]) if len(args) > 0 else 1_000_000
+    report("bulk map load ({} tiles)".format(tiles), run(tiles))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,41 @@
+import gc
+import time
+from typing import Callable
+
+from BTP.BTP import *
+
+
+class BenchWin(Win):
+
+    def __init__(self, render_size: Vec = Vec(1280, 960)) -> None:
+        super().__init__()
+        self.render_size = render_size
+
+    def get_render_size(self) -> Vec:
+        return self.render_size
+
+
+# wall time of each run, setup (not timed) runs before each of them
+def measure_runs(func: Callable, *args, repeat: int = 3, setup: Callable | None = None) -> list[float]:
+    times = []
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+
+        start_time = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start_time)
+    return times
+
+
+def measure(func: Callable, *args, repeat: int = 3, setup: Callable | None = None) -> float:
+    return min(measure_runs(func, *args, repeat=repeat, setup=setup))
+
+
+def report(title: str, results: dict):
+    print(title)
+    for key, val in results.items():
+        if isinstance(val, float):
+            val = round(val, 4)
+        print("  {}: {}".format(key, val))
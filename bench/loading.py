@@ -0,0 +1,80 @@
+import itertools
+import os
+import sys
+import time
+
+from core import TextureAtlas, ObjectBaseAtlas, AssetLoader, LoadingProgress
+from components import *
+
+from bench.common import report
+
+ASSETS_DIR = "./assets/"
+OBJECT_BASE = [Character, Doors, Floor, Wall, Coin, Chest, SingleItem, Flask, Weapon, Hearts]
+
+
+# headless stand-in for Win.load_image: read the file, hand out an id
+class ImageLoader:
+
+    def __init__(self) -> None:
+        self.ids = itertools.count(1)
+
+    def load_image(self, path: str) -> int:
+        with open(path, 'rb') as file:
+            file.read()
+        return next(self.ids)
+
+
+def make_atlas() -> ObjectBaseAtlas:
+    atlas = ObjectBaseAtlas()
+    for type in OBJECT_BASE:
+        atlas.register(type)
+    return atlas
+
+
+# previous Dungeon.on_load: one file at a time, then classify every texture
+def legacy_load(directory: str) -> ObjectBaseAtlas:
+    images = ImageLoader()
+    textures = TextureAtlas()
+    atlas = make_atlas()
+
+    for filename in os.listdir(directory):
+        textures.add(filename, images.load_image(os.path.abspath(directory + filename)))
+
+    for texture in textures.textures:
+        atlas.add(texture)
+    atlas.build()
+    return atlas
+
+
+def pipeline_load(directory: str) -> ObjectBaseAtlas:
+    atlas = make_atlas()
+    AssetLoader(directory, atlas, LoadingProgress()).load(ImageLoader().load_image, TextureAtlas())
+    return atlas
+
+
+def run(directory: str = ASSETS_DIR) -> dict:
+    start_time = time.perf_counter()
+    legacy = legacy_load(directory)
+    legacy_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    pipeline = pipeline_load(directory)
+    pipeline_time = time.perf_counter() - start_time
+
+    return {
+        "files": len(os.listdir(directory)),
+        "objects": len(pipeline.objects),
+        "legacy_objects": len(legacy.objects),
+        "legacy_startup_ms": legacy_time * 1000,
+        "pipeline_startup_ms": pipeline_time * 1000
+    }
+
+
+def main(args):
+    directory = args[0] if len(args) > 0 else ASSETS_DIR
+    report("asset loading ({})".format(directory), run(directory))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,106 @@
+import os
+import pickle
+import sys
+import tempfile
+
+from BTP.BTP import *
+from components import Wall, Floor
+from components.character import CharacterData
+from map import MapData, ChunkData, TileData, Chunk, MapFile
+from utility import TILE_SIZE, DungeonActionData, DungeonRoleTypes
+
+from bench.common import measure, report
+from bench.prototypes import make_atlas
+
+
+def make_map_data(width: int, height: int, tiles_per_chunk: int = 36) -> MapData:
+    map_data = MapData()
+    map_data.player = CharacterData()
+    map_data.player.name = "knight_m"
+    map_data.player.plugin_name = "control"
+    map_data.player.position = Vec()
+    map_data.player.action_data = DungeonActionData(role=DungeonRoleTypes.PLAYER)
+
+    for cy in range(height):
+        for cx in range(width):
+            chunk = ChunkData()
+            chunk.position = Chunk.from_key((cx, cy))
+            for i in range(tiles_per_chunk):
+                tile = TileData()
+                tile.object = Wall if i % 6 == 0 else Floor
+                tile.name = "wall_mid" if i % 6 == 0 else "floor_1"
+                tile.position = chunk.position + Vec(i % Chunk.DEFAULT_SIZE, i // Chunk.DEFAULT_SIZE) * TILE_SIZE
+                tile.flip = Vec(1)
+                tile.collision = i % 6 == 0
+                chunk.tiles.append(tile)
+            map_data.chunks.append(chunk)
+    return map_data
+
+
+def save_pickle(path: str, map_data: MapData):
+    with open(path, 'wb') as file:
+        pickle.dump(map_data, file)
+
+
+def load_pickle(path: str) -> MapData:
+    with open(path, 'rb') as file:
+        return pickle.load(file)
+
+
+def load_map_file(path: str, types: dict):
+    with MapFile(path, types) as map_file:
+        map_file.read_entities()
+        return map_file.read_chunks()
+
+
+# the menu only needs one chunk (or none): pickle still has to load everything
+def load_chunk_pickle(path: str, key: tuple[int, int]):
+    for chunk in load_pickle(path).chunks:
+        if Chunk.get_key(chunk.position) == key:
+            return chunk
+
+
+def load_chunk_map_file(path: str, types: dict, key: tuple[int, int]):
+    with MapFile(path, types) as map_file:
+        return map_file.read_chunk(key)
+
+
+def run(width: int = 64, height: int = 64) -> dict:
+    types = MapFile.get_types(make_atlas())
+    map_data = make_map_data(width, height)
+    key = (width // 2, height // 2)
+
+    with tempfile.TemporaryDirectory() as directory:
+        dat_path = os.path.join(directory, "bench" + MapFile.LEGACY_EXTENSION)
+        map_path = os.path.join(directory, "bench" + MapFile.EXTENSION)
+
+        results = {
+            "chunks": len(map_data.chunks),
+            "tiles": sum(len(chunk.tiles) for chunk in map_data.chunks),
+            "pickle_save_s": measure(save_pickle, dat_path, map_data),
+            "binary_save_s": measure(MapFile.write, map_path, map_data),
+            "pickle_bytes": os.path.getsize(dat_path),
+            "binary_bytes": os.path.getsize(map_path),
+            "pickle_load_s": measure(load_pickle, dat_path),
+            "binary_load_s": measure(load_map_file, map_path, types),
+            "pickle_chunk_s": measure(load_chunk_pickle, dat_path, key),
+            "binary_chunk_s": measure(load_chunk_map_file, map_path, types, key)
+        }
+
+        # the converted file holds the same tiles
+        loaded = load_chunk_map_file(map_path, types, key)
+        expected = load_chunk_pickle(dat_path, key)
+        results["roundtrip"] = [(tile.object, tile.name, tile.position, tile.collision) for tile in loaded.tiles] == \
+            [(tile.object, tile.name, tile.position, tile.collision) for tile in expected.tiles]
+
+    return results
+
+
+def main(args):
+    size = int(args[0]) if len(args) > 0 else 64
+    report("map file ({0}x{0} chunks)".format(size), run(size, size))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
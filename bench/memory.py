@@ -0,0 +1,66 @@
+import copy
+import sys
+import tracemalloc
+
+from BTP.BTP import *
+from core import ObjectBaseAtlas
+from utility import TILE_SIZE, DungeonActionTypes
+
+from bench.common import report
+from bench.prototypes import make_atlas
+
+
+# attributes every placed tile carried before slots and prototypes, one __dict__ per tile
+class LegacyTile:
+
+    def __init__(self, obj, position: Vec, flip: Vec, collision: bool) -> None:
+        self.texture = copy.deepcopy(obj.texture)
+        self.name = obj.name
+        self.position = position
+        self.size = Vec(obj.size.x, obj.size.y)
+        self.flip = flip
+        self.origin = Vec(-1)
+        self.angle = 0
+        self.animation_speed = 10.0
+        self.animation_index = 0.0
+        self.collision = collision
+        self.accepted_actions = list(DungeonActionTypes.all())
+        self.btp = None
+
+
+def measure_tiles(atlas: ObjectBaseAtlas, spawn, count: int) -> int:
+    tracemalloc.start()
+
+    tiles = []
+    for index in range(count):
+        obj = atlas.objects[index % len(atlas.objects)]
+        tiles.append(spawn(obj, Vec(index % 1000, index // 1000) * TILE_SIZE, Vec(1), index % 3 == 0))
+
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return memory
+
+
+def run(count: int = 100000) -> dict:
+    atlas = make_atlas()
+
+    legacy = measure_tiles(atlas, LegacyTile, count)
+    compact = measure_tiles(atlas, lambda obj, position, flip, collision: obj.prototype.spawn(position, flip, collision), count)
+
+    return {
+        "tiles": count,
+        "legacy_bytes_per_tile": legacy / count,
+        "slots_bytes_per_tile": compact / count,
+        "legacy_mb_for_1m_tiles": legacy / count * 1000000 / 1024 / 1024,
+        "slots_mb_for_1m_tiles": compact / count * 1000000 / 1024 / 1024
+    }
+
+
+def main(args):
+    count = int(args[0]) if len(args) > 0 else 100000
+    report("placed tile memory ({} tiles)".format(count), run(count))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,99 @@
+import copy
+import sys
+import time
+import tracemalloc
+
+from BTP.BTP import *
+from core import AnimatedTexture, ObjectBaseAtlas
+from components import Wall, Floor
+from utility import TILE_SIZE
+
+from bench.common import report
+
+
+def make_atlas() -> ObjectBaseAtlas:
+    atlas = ObjectBaseAtlas()
+    atlas.register(Wall)
+    atlas.register(Floor)
+
+    for index, name in enumerate(["wall_mid", "wall_left", "floor_1", "floor_spikes"]):
+        texture = AnimatedTexture()
+        texture.name = name
+        texture.textures = [index * 4 + frame for frame in range(4)]
+        texture.textures_names = ["{}_anim_f{}.png".format(name, frame) for frame in range(4)]
+        atlas.add(texture).size = Vec(TILE_SIZE)
+
+    atlas.build()
+    return atlas
+
+
+# previous implementation of ObjectBase.copy: a deep copied texture and a copy of every attribute
+def legacy_copy(obj):
+    classbase = type(obj)
+    cp = classbase(copy.deepcopy(obj.texture))
+
+    for attr_name, attr in obj.get_state().items():
+        if attr_name == 'prototype' or callable(attr) or attr is None:
+            continue
+
+        try:
+            setattr(cp, attr_name, copy.copy(attr))
+        except:
+            setattr(cp, attr_name, attr)
+
+    return cp
+
+
+def legacy_spawn(atlas: ObjectBaseAtlas, classbase, name, position: Vec, flip: Vec, collision: bool):
+    for obj in atlas.objects:
+        if isinstance(obj, classbase) and obj.name == name:
+            tile = legacy_copy(obj)
+            tile.position = position
+            tile.flip = flip
+            tile.collision = collision
+            return tile
+
+
+def build_tiles(atlas: ObjectBaseAtlas, spawn, count: int) -> tuple[list, float, int]:
+    objects = [(type(obj), obj.name) for obj in atlas.objects]
+
+    tracemalloc.start()
+    start_time = time.perf_counter()
+
+    tiles = []
+    for index in range(count):
+        classbase, name = objects[index % len(objects)]
+        tiles.append(spawn(atlas, classbase, name, Vec(index % 1000, index // 1000) * TILE_SIZE, Vec(1), index % 3 == 0))
+
+    total_time = time.perf_counter() - start_time
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return tiles, total_time, memory
+
+
+def run(count: int = 100000) -> dict:
+    atlas = make_atlas()
+
+    tiles, legacy_time, legacy_memory = build_tiles(atlas, legacy_spawn, count)
+    del tiles
+    tiles, spawn_time, spawn_memory = build_tiles(atlas, ObjectBaseAtlas.spawn, count)
+
+    return {
+        "tiles": count,
+        "legacy_load_s": legacy_time,
+        "prototype_load_s": spawn_time,
+        "legacy_bytes_per_tile": legacy_memory / count,
+        "prototype_bytes_per_tile": spawn_memory / count,
+        "memory_saved_mb": (legacy_memory - spawn_memory) / 1024 / 1024
+    }
+
+
+def main(args):
+    count = int(args[0]) if len(args) > 0 else 100000
+    report("tile instantiation ({} tiles)".format(count), run(count))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,288 @@
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+
+from headless import install
+
+install()  # same stand-in window on every machine, the numbers stay comparable
+
+from BTP.BTP import *
+from BTP.util import Storage
+from components import Floor
+from map import MapBase, MapFile
+from utility import TILE_SIZE
+
+from bench.common import measure_runs, report
+from headless.runner import HeadlessRunner, iter_room
+
+
+VERSION = 1
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+LEGACY_TILES = 100_000  # pickled maps above this size take minutes to save
+ENTITIES = 16
+STEPS = 100  # camera positions of a pan
+EDITS = 200  # tiles added then removed by an editor session
+THRESHOLD = 0.15  # slower than the baseline by more than this ratio: regression
+TIMINGS = ("_ms", "_us")  # compared metrics, lower is better
+REPEAT = 5  # runs of a compared metric in a round, the fastest one is kept
+ROUNDS = 3  # passes over every metric, spread over the run: a slow period of the machine only hits some of them
+
+
+# diagonal through the room, camera centered on each position
+def get_path(btp: Win, size: int, steps: int) -> list[Vec]:
+    half = btp.get_render_size() / 2
+    end = Vec(max(half.x, size * TILE_SIZE - half.x), max(half.y, size * TILE_SIZE - half.y))
+    return [half + (end - half) * (step / max(steps - 1, 1)) for step in range(steps)]
+
+
+def pan(btp: Win, path: list[Vec], update):
+    btp.camera_offset = btp.get_render_size() / 2
+    for position in path:
+        btp.camera_pos = position
+        update()
+
+
+# fastest of REPEAT runs, per operation (count per run) in the unit of the key; the spread of the runs
+# (median over fastest) is kept in noise: differences below it are not flagged
+def sample(results: dict, noise: dict, key: str, count: int, func, *args, setup=None):
+    times = sorted(measure_runs(func, *args, repeat=REPEAT, setup=setup))
+    results[key] = times[0] / max(count, 1) * (1000 if key.endswith("_ms") else 1_000_000)
+    noise[key] = times[len(times) // 2] / times[0] - 1 if times[0] > 0 else 0.0
+
+
+def bench_view(runner: HeadlessRunner, path: list[Vec], noise: dict) -> dict:
+    game_map = runner.map
+    btp = game_map.btp
+    render_size = btp.get_render_size()
+
+    results = {}
+    sample(results, noise, "map_view_update_ms", len(path), pan, btp, path, lambda: MapBase.on_view_update(game_map))
+    sample(results, noise, "game_view_update_ms", len(path), pan, btp, path, game_map.on_view_update)
+    sample(results, noise, "character_view_update_ms", len(path), pan, btp, path, lambda: game_map.on_character_view_update(btp.camera_pos, render_size, Vec(3)))
+
+    # chunks seen and collisions met along the path
+    views = []
+    player = game_map.player_ref
+    steps = []
+    for position in path:
+        btp.camera_pos = position
+        game_map.on_view_update()
+        views += [chunk for chunk, tiles in game_map.frame_view.chunks]
+
+        player.position = position - player.size / 2
+        steps.append((player.position, game_map.get_collisions(*player.get_rect())))
+
+    def get_views():
+        for chunk in views:
+            chunk.get_view()
+
+    def get_collisions():
+        for position, collisions in steps:
+            player.position = position
+            game_map.get_collisions(*player.get_rect())
+
+    move = Vec(3, 0)
+    def can_move():
+        for position, collisions in steps:
+            player.position = position
+            player.can_move(move, collisions)
+
+    sample(results, noise, "chunk_get_view_us", len(views), get_views)
+    sample(results, noise, "collisions_query_us", len(steps), get_collisions)
+    sample(results, noise, "can_move_us", len(steps), can_move)
+    results["view_chunks"] = len(views) / len(path)
+    results["view_collisions"] = sum(len(collisions) for position, collisions in steps) / len(steps)
+    return results
+
+
+# stacked tiles painted over the view then erased, like a creator stroke
+def bench_editor(runner: HeadlessRunner, path: str, edits: int, noise: dict) -> dict:
+    creator = runner.dungeon.map_creator
+    creator.clear_map()
+    creator.load_map(path)
+
+    btp = creator.btp
+    btp.camera_offset = Vec()
+    btp.camera_pos = Vec(TILE_SIZE)
+    creator.on_view_update()
+
+    columns = int(btp.get_render_size().x // TILE_SIZE) - 1
+    lines = int(btp.get_render_size().y // TILE_SIZE) - 1
+    positions = [btp.camera_pos + Vec(i % columns, (i // columns) % lines) * TILE_SIZE for i in range(edits)]
+
+    painted = False
+
+    def add():
+        nonlocal painted
+        for position in positions:
+            creator.map_add(creator.atlas.spawn(Floor, "floor_1", position, Vec(1), False))
+        painted = True
+
+    def remove():
+        nonlocal painted
+        for position in reversed(positions):
+            creator.map_remove(position)
+        painted = False
+
+    def erase():
+        if painted:
+            remove()
+
+    # each add starts from the erased view, each remove from the painted one
+    results = {}
+    sample(results, noise, "map_add_us", edits, add, setup=erase)
+    sample(results, noise, "map_remove_us", edits, remove, setup=add)
+
+    creator.clear_map()
+    return results
+
+
+def bench_storage(runner: HeadlessRunner, path: str, tiles: int, noise: dict) -> dict:
+    game_map = runner.map
+
+    # the export closes the pager of a streamed map: every save starts from the loaded map
+    def reload():
+        game_map.clear_map()
+        game_map.load_map(path)
+
+    results = {}
+    sample(results, noise, "save_ms", 1, game_map.export_map, setup=reload)
+
+    if tiles <= LEGACY_TILES:
+        map_data = game_map.get_map_data()
+        storage = Storage(path + "_legacy")
+        sample(results, noise, "legacy_save_ms", 1, setattr, storage, "state", map_data)
+        sample(results, noise, "legacy_load_ms", 1, game_map.load_map_storage, path + "_legacy", {}, setup=game_map.clear_map)
+    return results
+
+
+def run_size(runner: HeadlessRunner, directory: str, tiles: int, steps: int, edits: int, noise: dict) -> dict:
+    size = math.ceil(math.sqrt(tiles))
+    path = os.path.join(directory, "suite_{}".format(tiles))
+    MapFile.write_chunks(path + MapFile.EXTENSION, iter_room(size), *runner.get_characters(size, ENTITIES))
+
+    game_map = runner.map
+    results = {"tiles": size * size}
+    sample(results, noise, "load_ms", 1, game_map.load_map, path, setup=game_map.clear_map)
+    results["paged"] = game_map.pager is not None
+    results.update(bench_view(runner, get_path(game_map.btp, size, steps), noise))
+    results.update(bench_storage(runner, path, tiles, noise))
+    game_map.clear_map()
+
+    results.update(bench_editor(runner, path, edits, noise))
+    return results
+
+
+# one pass over every metric: (results, noise) per section
+def run_round(runner: HeadlessRunner, directory: str, sizes, steps: int, edits: int) -> tuple[dict, dict]:
+    objects = runner.map.atlas.objects
+
+    def copy_objects():
+        for obj in objects:
+            obj.copy()
+
+    results = {"objects": {}}
+    noise = {"objects": {}}
+    sample(results["objects"], noise["objects"], "copy_us", len(objects), copy_objects)
+
+    for tiles in sizes:
+        section = "{}_tiles".format(tiles)
+        noise[section] = {}
+        results[section] = run_size(runner, directory, tiles, steps, edits, noise[section])
+    return results, noise
+
+
+# fastest round of every timing; its noise is the larger of the spread between the rounds
+# (the machine speed drifts over a run) and the usual spread of the runs inside a round
+def merge_rounds(rounds: list[tuple[dict, dict]]) -> tuple[dict, dict]:
+    results = {}
+    noise = {}
+    for section, metrics in rounds[0][0].items():
+        results[section] = dict(metrics)
+        noise[section] = {}
+        for key in metrics:
+            if not key.endswith(TIMINGS):
+                continue
+
+            values = [round_results[section][key] for round_results, round_noise in rounds]
+            spreads = sorted(round_noise[section][key] for round_results, round_noise in rounds)
+            results[section][key] = min(values)
+            noise[section][key] = max(max(values) / min(values) - 1 if min(values) > 0 else 0.0, spreads[len(spreads) // 2])
+    return results, noise
+
+
+def run(sizes=SIZES, steps: int = STEPS, edits: int = EDITS, rounds: int = ROUNDS) -> dict:
+    runner = HeadlessRunner()
+    with tempfile.TemporaryDirectory() as directory:
+        merged, noise = merge_rounds([run_round(runner, directory, sizes, steps, edits) for i in range(rounds)])
+
+    return {
+        "version": VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "steps": steps,
+        "edits": edits,
+        "repeat": REPEAT,
+        "rounds": rounds,
+        "results": merged,
+        "noise": noise
+    }
+
+
+# timings slower than the baseline by more than the threshold, and by more than the noise of both runs
+def compare(results: dict, baseline: dict, threshold: float = THRESHOLD) -> list[str]:
+    regressions = []
+    for section, metrics in results["results"].items():
+        base = baseline.get("results", {}).get(section, {})
+        noise = results.get("noise", {}).get(section, {})
+        base_noise = baseline.get("noise", {}).get(section, {})
+        for key, val in metrics.items():
+            if not key.endswith(TIMINGS) or not base.get(key):
+                continue
+
+            ratio = val / base[key]
+            floor = max(threshold, noise.get(key, 0.0) + base_noise.get(key, 0.0))
+            line = "{} {}: {:.4f} -> {:.4f} ({:+.1f}%, noise {:.1f}%)".format(section, key, base[key], val, (ratio - 1) * 100, floor * 100)
+            if ratio > 1 + floor:
+                regressions.append(line)
+                line += " REGRESSION"
+            print("  " + line)
+    return regressions
+
+
+def main(args):
+    parser = argparse.ArgumentParser(prog="python -m bench.suite", description="Map, chunk and collision benchmarks on synthetic maps.")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in SIZES), help="map sizes in tiles")
+    parser.add_argument("--steps", type=int, default=STEPS)
+    parser.add_argument("--edits", type=int, default=EDITS)
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="passes over every metric, the fastest is kept")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", help="baseline results, the exit code is 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    options = parser.parse_args(args)
+
+    results = run([int(size) for size in options.sizes.split(",")], options.steps, options.edits, options.rounds)
+    for section, metrics in results["results"].items():
+        report(section, metrics)
+
+    with open(options.out, 'w') as file:
+        json.dump(results, file, indent=2)
+
+    if options.compare is not None:
+        with open(options.compare, 'r') as file:
+            baseline = json.load(file)
+
+        print("compared to {}".format(options.compare))
+        regressions = compare(results, baseline, options.threshold)
+        if len(regressions) != 0:
+            print("{} regression(s) over {:.0%}".format(len(regressions), options.threshold))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,70 @@
+import sys
+import threading
+import time
+
+from BTP.BTP import *
+from map.updater import ViewUpdater
+
+from bench.common import report
+
+
+class IdleCamera:
+
+    def __init__(self) -> None:
+        self.camera_pos = Vec()
+        self.camera_offset = Vec()
+        self.running = True
+
+    def is_running(self) -> bool:
+        return self.running
+
+
+# previous implementation: poll the camera without ever sleeping
+def spin_updater(camera: IdleCamera):
+    last_position = Vec()
+    last_offset = Vec()
+    while camera.is_running():
+        if camera.camera_pos != last_position or camera.camera_offset != last_offset:
+            last_position = camera.camera_pos
+            last_offset = camera.camera_offset
+
+
+def cpu_usage(start, stop, duration: float) -> float:
+    cpu_time = time.process_time()
+    start()
+    time.sleep(duration)
+    stop()
+    return (time.process_time() - cpu_time) / duration * 100
+
+
+def run(duration: float = 2.0) -> dict:
+    camera = IdleCamera()
+    thread = threading.Thread(target=spin_updater, args=(camera,))
+
+    def stop_spin():
+        camera.running = False
+        thread.join()
+
+    spin = cpu_usage(thread.start, stop_spin, duration)
+
+    camera.running = True
+    updater = ViewUpdater(lambda: None, camera.is_running)
+    event = cpu_usage(updater.start, updater.stop, duration)
+
+    return {
+        "duration_s": duration,
+        "spin_cpu_percent": spin,
+        "event_cpu_percent": event,
+        "event_wakeups": updater.wakeups,
+        "event_updates": updater.updates
+    }
+
+
+def main(args):
+    duration = float(args[0]) if len(args) > 0 else 2.0
+    report("idle camera CPU usage", run(duration))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
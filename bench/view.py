@@ -0,0 +1,77 @@
+import sys
+
+from BTP.BTP import *
+from core import ComponentObject, ObjectBaseAtlas, Texture
+from map import MapBase, Chunk, FrameView
+from utility import TILE_SIZE
+
+from bench.common import BenchWin, measure, report
+
+
+def make_tile(btp: Win, position: Vec) -> ComponentObject:
+    texture = Texture()
+    texture.name = "bench"
+    texture.texture = 0
+
+    tile = ComponentObject(texture)
+    tile.btp = btp
+    tile.position = position
+    tile.size = Vec(TILE_SIZE)
+    return tile
+
+
+def make_map(btp: Win, width: int, height: int, tiles_per_chunk: int = 4) -> MapBase:
+    map_base = MapBase(btp, ObjectBaseAtlas())
+    for cy in range(height):
+        for cx in range(width):
+            chunk = Chunk(btp, map_base.atlas, Chunk.from_key((cx, cy)))
+            for i in range(tiles_per_chunk):
+                chunk.place_tile(make_tile(btp, chunk.position + Vec(i % Chunk.DEFAULT_SIZE, i // Chunk.DEFAULT_SIZE) * TILE_SIZE))
+            map_base.map.add(chunk)
+    return map_base
+
+
+# previous implementation: test every chunk against the camera rect
+def scan_view(map_base: MapBase):
+    btp = map_base.btp
+    tmp = []
+    for chunk in map_base.map:
+        if btp.col_rect_rect(btp.camera_pos - btp.camera_offset, btp.get_render_size(), chunk.position, chunk.size):
+            tmp.append((chunk, chunk.get_view()))
+    map_base.frame_view = FrameView(tuple(tmp))
+
+
+def pan(map_base: MapBase, update, steps: int):
+    btp = map_base.btp
+    map_size = Vec(*max(map_base.map.chunks)) * (Chunk.DEFAULT_SIZE * TILE_SIZE)
+    travel = map_size - btp.get_render_size()
+
+    for step in range(steps):
+        btp.camera_pos = travel * (step / steps)
+        update()
+
+
+def run(width: int = 128, height: int = 128, steps: int = 200) -> dict:
+    btp = BenchWin()
+    map_base = make_map(btp, width, height)
+
+    scan = measure(pan, map_base, lambda: scan_view(map_base), steps)
+    index = measure(pan, map_base, map_base.on_view_update, steps)
+
+    return {
+        "chunks": len(map_base.map),
+        "steps": steps,
+        "scan_ms_per_update": scan / steps * 1000,
+        "index_ms_per_update": index / steps * 1000,
+        "speedup": scan / index if index != 0 else 0
+    }
+
+
+def main(args):
+    size = int(args[0]) if len(args) > 0 else 128
+    report("view update ({0}x{0} chunks)".format(size), run(size, size))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -15,6 +15,9 @@ class CharacterData:
 
 
 class CharacterPlugin:
+    # plugin class of each plugin name (None: not found), the module is executed once
+    classes: dict[str, type | None] = {}
+
     def __init__(self, character, atlas: Optional[ObjectBaseAtlas] = None) -> None:
         self.character: Character = character
         self.atlas: Optional[ObjectBaseAtlas] = atlas
@@ -26,32 +29,43 @@ class CharacterPlugin:
         return "default"
 
     @staticmethod
-    def load(name: str, character, atlas: Optional[ObjectBaseAtlas] = None):
+    def get_class(name: str) -> type | None:
+        if name in CharacterPlugin.classes:
+            return CharacterPlugin.classes[name]
+
+        plugin_class = None
         try:
             spec = util.spec_from_file_location(name, os.path.join( os.path.abspath('./plugin'), name+'.py'))
             plugin = util.module_from_spec(spec)
             spec.loader.exec_module(plugin)
 
             plugin_class = getattr(plugin, 'Character'+name.title()+'Plugin', None)
-
-            if plugin_class is not None and callable(plugin_class):
-                obj = plugin_class(character, atlas)
-                return obj
+            if not callable(plugin_class):
+                plugin_class = None
         except:
             pass
 
+        CharacterPlugin.classes[name] = plugin_class
+        return plugin_class
+
+    @staticmethod
+    def load(name: str, character, atlas: Optional[ObjectBaseAtlas] = None):
+        plugin_class = CharacterPlugin.get_class(name)
+        if plugin_class is not None:
+            try:
+                return plugin_class(character, atlas)
+            except:
+                pass
+
         return CharacterPlugin(character)
 
 class Character(ComponentObject):
+    ANIMATION_SPEED = 8
 
     def __init__(self, texture: Texture | AnimatedTexture) -> None:
         super().__init__(texture)
         self.name = Character.get_group_name(self.name)
 
-        self.hit = []
-        self.run = []
-        self.idle = []
-
         self.state = "idle"
 
         self.force = Vec()
@@ -77,6 +91,45 @@ class Character(ComponentObject):
     def check_name(name: str):
         return name.endswith('idle') or name.endswith('run') or name.endswith('hit')
 
+    @staticmethod
+    def get_role(filename: str) -> str:
+        parts = filename.split('_')
+        for role in ("hit", "idle", "run"):
+            if role in parts:
+                return role
+        return ""
+
+    @classmethod
+    def get_states(cls, texture: Texture | AnimatedTexture) -> dict[str, tuple[int, ...]]:
+        states = {"hit": [], "idle": [], "run": []}
+        if is_animated(texture) and len(texture.textures) == len(texture.textures_names):
+            # roles come from the asset manifest, names are only parsed for unclassified frames
+            for filename, role, frame in zip(texture.textures_names, get_roles(texture), texture.textures):
+                if role is None:
+                    role = cls.get_role(filename)
+                if role in states:
+                    states[role].append(frame)
+
+        return {role: tuple(frames) for role, frames in states.items()}
+
+    # shared frame table of the atlas object
+    def get_state_frames(self, state: str) -> tuple[int, ...]:
+        if self.prototype is None:
+            return ()
+        return self.prototype.states.get(state, ())
+
+    @property
+    def hit(self) -> tuple[int, ...]:
+        return self.get_state_frames("hit")
+
+    @property
+    def run(self) -> tuple[int, ...]:
+        return self.get_state_frames("run")
+
+    @property
+    def idle(self) -> tuple[int, ...]:
+        return self.get_state_frames("idle")
+
     def copy(self):
         obj = super().copy()
         obj.inventory = CharacterInventory(obj.btp, obj)
@@ -135,17 +188,6 @@ class Character(ComponentObject):
         super().on_ready(btp)
         self.inventory = CharacterInventory(btp, self)
 
-        if is_animated(self.texture) and len(self.texture.textures) == len(self.texture.textures_names):
-            for index in range(0, len(self.texture.textures)):
-                last = self.texture.textures_names[index].split('_')
-
-                if "hit" in last:
-                    self.hit.append(self.texture.textures[index])
-                elif "idle" in last:
-                    self.idle.append(self.texture.textures[index])
-                elif "run" in last:
-                    self.run.append(self.texture.textures[index])
-
 
     def is_alive(self):
         return self.life > 0
@@ -184,11 +226,9 @@ class Character(ComponentObject):
 
 
     def get_frame(self, dt: float):
-        frames = getattr(self, self.state)
+        frames = self.get_state_frames(self.state)
         if len(frames) != 0:
-            frame = int(self.animation_index) % len(frames)
-            self.animation_index += dt * 8
-            return frames[frame-1]
+            return frames[ANIMATION_CLOCK.get_index(len(frames), Character.ANIMATION_SPEED, self.animation_phase) - 1]
         return 0
 
     def on_draw_ui(self, dt: float):
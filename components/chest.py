@@ -3,6 +3,7 @@ from core import *
 from utility import DungeonActionData, DungeonActionTypes, DungeonRoleTypes, Keyboard, draw_key_interract
 
 class Chest(Tileset):
+    __slots__ = ('state', 'valid', 'collect', 'interact', 'player_ref')
 
     def __init__(self, texture: Texture | AnimatedTexture) -> None:
         super().__init__(texture)
@@ -42,9 +43,9 @@ class Chest(Tileset):
                 return self.texture.textures[0]
             case "animation":
                 if self.accept_action(DungeonActionTypes.AROUND):
-                    self.accepted_actions.remove(DungeonActionTypes.AROUND)
+                    self.accepted_actions = tuple(name for name in self.accepted_actions if name != DungeonActionTypes.AROUND)
 
-                frame = super().get_frame(dt)
+                frame = self.advance_frame(dt)
                 if int(self.animation_index)%len(self.texture.textures) == 0:
                     self.state = "opened"
                 return frame
@@ -2,6 +2,7 @@ from core import *
 
 
 class Flask(CollectableItem):
+    __slots__ = ()
 
     def __init__(self, texture: Texture | AnimatedTexture) -> None:
         super().__init__(texture)
@@ -4,6 +4,7 @@ from utility import DungeonActionTypes, DungeonActionData, DungeonRoleTypes
 from components.character import Character
 
 class Floor(Tileset):
+    __slots__ = ()
 
     @staticmethod
     def check_name(name: str) -> bool:
@@ -24,7 +25,8 @@ class Floor(Tileset):
         if action.data.role != DungeonRoleTypes.PLAYER:
             return
 
-        frame = int(self.animation_index) % len(self.texture.textures)
+        # same index as the drawn frame
+        frame = self.get_animation_index()
         if frame == 0 or frame == 3:
             char: Character = action.object
             char.damage(10)
@@ -32,6 +34,9 @@ class Floor(Tileset):
 
         return True
 
+    def has_action(self) -> bool:
+        return self.name == "floor_spikes"
+
     def on_action(self, action: ActionEvent):
         if self.name == "floor_spikes":
             return self.trap_damage(action)
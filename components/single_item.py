@@ -2,6 +2,7 @@ from core import *
 from utility import TILE_SIZE
 
 class SingleItem(Tileset):
+    __slots__ = ()
 
     def __init__(self, texture: Texture | AnimatedTexture) -> None:
         super().__init__(texture)
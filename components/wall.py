@@ -1,6 +1,8 @@
 from core import *
 
 class Wall(Tileset):
+    __slots__ = ()
+
     @staticmethod
     def check_name(name: str) -> bool:
         return name.startswith('wall')
@@ -1,21 +1,29 @@
 from dataclasses import dataclass, field
 from core.system import *
+from core.manifest import AssetManifest
+from core.profiler import FrameProfiler, PROFILER
+from core.drawcalls import DrawRecorder, DrawFrame, DrawCommand
+from core.replay import InputSession, InputRecorder, InputReplayer, InputFrame, InputFileError
+from core.loader import AssetLoader, AssetEntry, LoadingProgress, LoadingPhase
 from BTP.BTP import *
 import BTP.BTP
 
 class Tileset(ComponentObject):
+    __slots__ = ()
 
     def __init__(self, texture: Texture | AnimatedTexture) -> None:
         super().__init__(texture)
 
 
 class SpecialTileset(ComponentObject):
+    __slots__ = ()
 
     def __init__(self, texture: Texture | AnimatedTexture) -> None:
         super().__init__(texture)
 
 
 class CollectableItem(ComponentObject):
+    __slots__ = ()
 
     def __init__(self, texture: Texture | AnimatedTexture) -> None:
         super().__init__(texture)
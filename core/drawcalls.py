@@ -0,0 +1,321 @@
+import json
+import os
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from BTP.BTP import *
+from core.system import TextureAtlas
+
+
+@dataclass
+class DrawCommand:
+    name: str
+    args: tuple
+    kwargs: dict
+    site: str  # file:line (function)
+
+
+@dataclass
+class DrawFrame:
+    index: int
+    camera_pos: Vec
+    camera_offset: Vec
+    camera_zoom: float
+    commands: dict[str, list[DrawCommand]] = field(default_factory=dict)  # per phase
+
+
+class DrawRecorder:
+    ENV = "DUNGEON_DRAWCALLS"  # any value but "0" attaches the recorder
+    DRAW_CALLS = (
+        "draw_circle", "draw_circleline", "draw_image", "draw_image_scale", "draw_line", "draw_line_bezier",
+        "draw_rect", "draw_rectgradient", "draw_rectline", "draw_rectrot", "draw_rectround", "draw_text"
+    )
+    TEXTURE_CALLS = ("draw_image", "draw_image_scale")  # first argument: texture id
+    HISTORY = 600  # frame totals kept
+    REFRESH = 0.5  # seconds between two overlay summaries
+    WORLD = "world"
+    UI = "ui"
+
+    def __init__(self, btp: Win) -> None:
+        self.btp = btp
+        self.enabled = os.environ.get(DrawRecorder.ENV, "0") not in ("", "0")  # attach once ready
+        self.attached = False
+
+        self.root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        # caller codes by id (hashing a code object is slow), referenced so the ids stay unique
+        self.codes: dict[int, object] = {}
+        self.files: dict[int, tuple[str, str]] = {}  # code id -> (file, subsystem)
+
+        # (draw call, caller code id, its caller code id, texture id or None) -> calls of the current frame
+        self.counts: dict[tuple, int] = {}
+        self.last_counts: dict[tuple, int] = {}
+        self.totals: deque = deque(maxlen=DrawRecorder.HISTORY)
+        self.frame_index = 0
+        self.phase = DrawRecorder.WORLD
+
+        # capture: the next frames with every argument and call site
+        self.capture_frames = 0
+        self.frames: list[DrawFrame] = []
+        self.current: DrawFrame | None = None
+
+        self.textures: dict[int, tuple[str, int]] = {}  # texture id -> (name, frame), TextureAtlas.get_keys
+        self.lines: dict[str, str] = {}
+        self.last_sample = 0.0
+
+    # the draw calls are shadowed on the instance, objects keep their btp reference
+    def attach(self):
+        if self.attached:
+            return
+
+        for name in DrawRecorder.DRAW_CALLS:
+            draw = getattr(self.btp, name, None)
+            if draw is not None:
+                setattr(self.btp, name, self.wrap(name, draw))
+        self.attached = True
+
+    def detach(self):
+        if not self.attached:
+            return
+
+        for name in DrawRecorder.DRAW_CALLS:
+            self.btp.__dict__.pop(name, None)
+        self.attached = False
+        self.current = None
+
+    def wrap(self, name: str, draw):
+        texture = name in DrawRecorder.TEXTURE_CALLS
+        getframe = sys._getframe
+        codes = self.codes
+
+        # counting: a frame lookup and a dict update per call, the codes are resolved by get_summary
+        def call(*args, **kwargs):
+            caller = getframe(1)
+            parent = caller.f_back
+            code = caller.f_code
+            parent_code = parent.f_code if parent is not None else None
+            key = (name, id(code), id(parent_code), args[0] if texture and len(args) != 0 else None)
+
+            counts = self.counts
+            count = counts.get(key)
+            if count is None:
+                count = 0
+                if id(code) not in codes:
+                    codes[id(code)] = code
+                if id(parent_code) not in codes:
+                    codes[id(parent_code)] = parent_code
+            counts[key] = count + 1
+
+            if self.current is not None:
+                self.record(name, args, kwargs, caller)
+            return draw(*args, **kwargs)
+
+        return call
+
+    @staticmethod
+    def copy_value(value):
+        if isinstance(value, Vec):
+            return Vec(value.x, value.y)
+        if isinstance(value, Color):
+            return Color(value.r, value.g, value.b, value.a)
+        return value
+
+    def record(self, name: str, args: tuple, kwargs: dict, caller):
+        site = "{}:{} ({})".format(self.get_file(caller.f_code), caller.f_lineno, caller.f_code.co_name)
+        command = DrawCommand(name, tuple(DrawRecorder.copy_value(arg) for arg in args),
+                              {key: DrawRecorder.copy_value(val) for key, val in kwargs.items()}, site)
+        self.current.commands.setdefault(self.phase, []).append(command)
+
+    # (file relative to the project, top package: map, components, screens, BTP...)
+    def get_location(self, code) -> tuple[str, str]:
+        if code is None:
+            return ("", "")
+
+        location = self.files.get(id(code))
+        if location is None:
+            path = os.path.relpath(code.co_filename, self.root).replace(os.sep, "/")
+            location = self.files[id(code)] = (path, path.split("/")[0] if "/" in path else path.removesuffix(".py"))
+        return location
+
+    def get_file(self, code) -> str:
+        return self.get_location(code)[0]
+
+    # the shared draw helpers of core (ComponentObject.on_draw...) belong to their caller
+    def get_subsystem(self, code, parent_code) -> str:
+        subsystem = self.get_location(code)[1]
+        if subsystem == "core" and parent_code is not None:
+            return self.get_location(parent_code)[1]
+        return subsystem
+
+    # render thread, before the world draws
+    def next_frame(self):
+        if not self.attached:
+            return
+
+        self.totals.append(sum(self.counts.values()))
+        self.last_counts = self.counts
+        self.counts = {}
+        self.frame_index += 1
+        self.phase = DrawRecorder.WORLD
+
+        if self.current is not None:
+            self.frames.append(self.current)
+            self.current = None
+        if self.capture_frames > 0:
+            self.capture_frames -= 1
+            self.current = DrawFrame(self.frame_index, DrawRecorder.copy_value(self.btp.camera_pos),
+                                     DrawRecorder.copy_value(self.btp.camera_offset), self.btp.camera_zoom)
+
+    def set_phase(self, phase: str):
+        self.phase = phase
+
+    def capture(self, frames: int = 1):
+        self.frames = []
+        self.capture_frames = frames
+
+    def is_capturing(self) -> bool:
+        return self.capture_frames > 0 or self.current is not None
+
+    # calls of the last complete frame
+    def get_summary(self) -> dict[str, dict]:
+        calls: dict[str, int] = {}
+        textures: dict[str, int] = {}
+        subsystems: dict[str, int] = {}
+        sites: dict[str, int] = {}
+
+        for (name, code_id, parent_id, texture), count in list(self.last_counts.items()):
+            code = self.codes[code_id]
+            calls[name] = calls.get(name, 0) + count
+            subsystem = self.get_subsystem(code, self.codes[parent_id])
+            subsystems[subsystem] = subsystems.get(subsystem, 0) + count
+            site = "{} ({})".format(self.get_file(code), code.co_name)
+            sites[site] = sites.get(site, 0) + count
+            if texture is not None:
+                texture_name = self.textures[texture][0] if texture in self.textures else str(texture)
+                textures[texture_name] = textures.get(texture_name, 0) + count
+
+        totals = tuple(self.totals)
+        return {
+            "frame": {
+                "calls": sum(calls.values()),
+                "min": min(totals, default=0),
+                "avg": sum(totals) / len(totals) if len(totals) != 0 else 0,
+                "max": max(totals, default=0)
+            },
+            "calls": DrawRecorder.sort_counts(calls),
+            "textures": DrawRecorder.sort_counts(textures),
+            "subsystems": DrawRecorder.sort_counts(subsystems),
+            "sites": DrawRecorder.sort_counts(sites)
+        }
+
+    @staticmethod
+    def sort_counts(counts: dict[str, int]) -> dict[str, int]:
+        return dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
+
+    # lines for the Stats overlays, summarized at most twice per second
+    def get_lines(self, top: int = 3) -> dict[str, str]:
+        now = time.perf_counter()
+        if now - self.last_sample < DrawRecorder.REFRESH:
+            return self.lines
+
+        summary = self.get_summary()
+        frame = summary["frame"]
+        lines = {"Draw calls": "{} (avg {:.0f}, max {})".format(frame["calls"], frame["avg"], frame["max"])}
+        for key in ("calls", "subsystems", "textures"):
+            lines["Draw " + key] = ", ".join("{} {}".format(name, count) for name, count in list(summary[key].items())[:top])
+
+        self.lines = lines
+        self.last_sample = now
+        return lines
+
+    # capture texture id -> backend texture id, through the names of the backend atlas
+    @staticmethod
+    def get_texture_map(textures: dict[int, tuple[str, int]], atlas: TextureAtlas) -> dict[int, int]:
+        texture_map = {}
+        for texture, (name, frame) in textures.items():
+            texture_id = atlas.get_texture_id(name, frame)
+            if texture_id is not None:
+                texture_map[texture] = texture_id
+        return texture_map
+
+    # issues the frame commands again on any Win compatible backend, texture_map: see get_texture_map
+    # (without it the ids are used as recorded: same backend, same load order)
+    @staticmethod
+    def replay(frame: DrawFrame, backend, phases: tuple[str, ...] = (WORLD, UI), camera: bool = True,
+               texture_map: dict[int, int] | None = None) -> int:
+        if camera:
+            backend.camera_pos = Vec(frame.camera_pos.x, frame.camera_pos.y)
+            backend.camera_offset = Vec(frame.camera_offset.x, frame.camera_offset.y)
+            backend.camera_zoom = frame.camera_zoom
+
+        count = 0
+        for phase in phases:
+            for command in frame.commands.get(phase, ()):
+                args = command.args
+                if texture_map is not None and command.name in DrawRecorder.TEXTURE_CALLS and len(args) != 0:
+                    # texture the backend does not have: nothing to draw
+                    if args[0] not in texture_map:
+                        continue
+                    args = (texture_map[args[0]],) + args[1:]
+
+                getattr(backend, command.name)(*args, **command.kwargs)
+                count += 1
+        return count
+
+    @staticmethod
+    def encode(value):
+        if isinstance(value, Vec):
+            return {"vec": [value.x, value.y]}
+        if isinstance(value, Color):
+            return {"color": [value.r, value.g, value.b, value.a]}
+        return value
+
+    @staticmethod
+    def decode(value):
+        if isinstance(value, dict):
+            if "vec" in value:
+                return Vec(*value["vec"])
+            if "color" in value:
+                return Color(*value["color"])
+        return value
+
+    def save_capture(self, path: str) -> bool:
+        data = {
+            "version": 2,
+            "textures": {str(texture): [name, frame] for texture, (name, frame) in self.textures.items()},
+            "frames": [{
+                "index": frame.index,
+                "camera": [DrawRecorder.encode(frame.camera_pos), DrawRecorder.encode(frame.camera_offset), frame.camera_zoom],
+                "commands": {phase: [[command.name, [DrawRecorder.encode(arg) for arg in command.args],
+                                      {key: DrawRecorder.encode(val) for key, val in command.kwargs.items()}, command.site]
+                                     for command in commands] for phase, commands in frame.commands.items()}
+            } for frame in self.frames]
+        }
+
+        try:
+            temp = path + ".tmp"
+            with open(temp, 'w') as file:
+                json.dump(data, file)
+            os.replace(temp, path)
+            return True
+        except OSError as e:
+            print(e)
+            return False
+
+    # (frames, texture id -> (name, frame) of the recording run)
+    @staticmethod
+    def load_capture(path: str) -> tuple[list[DrawFrame], dict[int, tuple[str, int]]]:
+        with open(path, 'r') as file:
+            data = json.load(file)
+
+        # version 1 stored the texture name only
+        textures = {int(texture): (key, 0) if isinstance(key, str) else tuple(key) for texture, key in data.get("textures", {}).items()}
+
+        frames = []
+        for frame in data["frames"]:
+            camera_pos, camera_offset, camera_zoom = frame["camera"]
+            frames.append(DrawFrame(frame["index"], DrawRecorder.decode(camera_pos), DrawRecorder.decode(camera_offset), camera_zoom, {
+                phase: [DrawCommand(name, tuple(DrawRecorder.decode(arg) for arg in args), {key: DrawRecorder.decode(val) for key, val in kwargs.items()}, site)
+                        for name, args, kwargs, site in commands] for phase, commands in frame["commands"].items()}))
+        return frames, textures
@@ -0,0 +1,156 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from core.system import TextureAtlas, ObjectBaseAtlas
+from core.manifest import AssetManifest
+
+
+class LoadingPhase:
+    NONE = "none"
+    DISCOVER = "discover"
+    READ = "read"
+    REGISTER = "register"
+    BUILD = "build"
+    DONE = "done"
+
+    @staticmethod
+    def all():
+        return (LoadingPhase.DISCOVER, LoadingPhase.READ, LoadingPhase.REGISTER, LoadingPhase.BUILD)
+
+
+class LoadingProgress:
+
+    def __init__(self) -> None:
+        self.phase = LoadingPhase.NONE
+        self.current = ""
+
+        self.files_done = 0
+        self.files_total = 0
+        self.bytes_done = 0
+        self.bytes_total = 0
+
+        self.lock = threading.Lock()
+
+    def start(self, phase: str, files_total: int = 0, bytes_total: int = 0):
+        with self.lock:
+            self.phase = phase
+            self.current = ""
+            self.files_done = 0
+            self.files_total = files_total
+            self.bytes_done = 0
+            self.bytes_total = bytes_total
+
+    def advance(self, filename: str, size: int = 0):
+        with self.lock:
+            self.current = filename
+            self.files_done += 1
+            self.bytes_done += size
+
+    # 0 to 1 over every phase
+    def get_ratio(self) -> float:
+        phases = LoadingPhase.all()
+        if self.phase == LoadingPhase.DONE:
+            return 1.0
+        if self.phase not in phases:
+            return 0.0
+
+        done = self.files_done / self.files_total if self.files_total != 0 else 0
+        return (phases.index(self.phase) + min(done, 1)) / len(phases)
+
+
+class AssetEntry:
+
+    def __init__(self, filename: str, path: str, size: int, mtime: int = 0) -> None:
+        self.filename = filename
+        self.path = path
+        self.size = size
+        self.mtime = mtime  # ns
+
+        self.group: str = filename.replace('.png', "")  # texture name or animation group
+        self.frame: int = -1  # animation frame index, -1 for a static texture
+        self.classbase = None
+        self.role: str = ""  # animation state for grouped classes (idle, run, hit)
+
+
+class AssetLoader:
+    WORKERS = 8
+
+    def __init__(self, directory: str, atlas: ObjectBaseAtlas, progress: LoadingProgress) -> None:
+        self.directory = directory
+        self.atlas = atlas
+        self.progress = progress
+
+    @staticmethod
+    def parse(entry: AssetEntry):
+        parts = entry.filename.split('_')
+        if len(parts) >= 3 and parts[-1].startswith('f') and parts[-2].lower() == 'anim':
+            entry.group = "_".join(parts[:-2])
+            frame = parts[-1][1:].replace('.png', "")
+            entry.frame = int(frame) if frame.isdigit() else 0
+
+    # worker: parse the name and find the owning class, the file itself is only read by load_image
+    def prepare(self, entry: AssetEntry) -> AssetEntry:
+        AssetLoader.parse(entry)
+        entry.classbase = self.atlas.get_type(entry.group)
+        entry.role = entry.classbase.get_role(entry.filename)
+
+        self.progress.advance(entry.filename, entry.size)
+        return entry
+
+    def prepare_batch(self, entries: list[AssetEntry]) -> list[AssetEntry]:
+        return [self.prepare(entry) for entry in entries]
+
+    def discover(self) -> list[AssetEntry]:
+        self.progress.start(LoadingPhase.DISCOVER)
+
+        entries = []
+        with os.scandir(self.directory) as files:
+            for file in files:
+                if file.is_file() and file.name.endswith('.png'):
+                    stat = file.stat()
+                    entries.append(AssetEntry(file.name, os.path.abspath(file.path), stat.st_size, stat.st_mtime_ns))
+                    self.progress.advance(file.name)
+        return entries
+
+    def scan(self) -> list[AssetEntry]:
+        entries = self.discover()
+        self.progress.start(LoadingPhase.READ, len(entries), sum(entry.size for entry in entries))
+
+        # the scan is always run: the manifest is valid for these exact files only
+        manifest = AssetManifest(self.directory, self.atlas)
+        loaded = manifest.load(entries)
+        if loaded is not None:
+            return loaded
+
+        # one batch per worker: a future per file costs more than parsing its name
+        batches = [entries[i::AssetLoader.WORKERS] for i in range(AssetLoader.WORKERS)]
+        with ThreadPoolExecutor(AssetLoader.WORKERS) as pool:
+            entries = [entry for batch in pool.map(self.prepare_batch, batches) for entry in batch]
+
+        # frames of a group registered in frame order
+        entries.sort(key=lambda entry: (entry.group, entry.frame, entry.filename))
+        manifest.save(entries)
+        return entries
+
+    # only this part touches the window: call it from the thread owning it
+    def register(self, entries: list[AssetEntry], load_image: Callable[[str], int], textures: TextureAtlas):
+        self.progress.start(LoadingPhase.REGISTER, len(entries), sum(entry.size for entry in entries))
+
+        types = {}
+        for entry in entries:
+            textures.add_entry(entry.group, entry.filename, load_image(entry.path), entry.frame >= 0, entry.role)
+            types[entry.group] = entry.classbase
+            self.progress.advance(entry.filename, entry.size)
+
+        self.progress.start(LoadingPhase.BUILD, len(textures.textures))
+        for texture in textures.textures:
+            self.atlas.add(texture, types.get(texture.name))
+            self.progress.advance(texture.name)
+        self.atlas.build()
+
+        self.progress.start(LoadingPhase.DONE)
+
+    def load(self, load_image: Callable[[str], int], textures: TextureAtlas):
+        self.register(self.scan(), load_image, textures)
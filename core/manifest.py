@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+
+from core.system import ObjectBaseAtlas, ObjectBase
+
+
+class AssetManifest:
+    VERSION = 2
+    SUFFIX = ".manifest.json"
+
+    def __init__(self, directory: str, atlas: ObjectBaseAtlas) -> None:
+        self.directory = directory
+        # next to the assets directory, not listed with the assets
+        self.path = os.path.normpath(directory) + AssetManifest.SUFFIX
+        self.atlas = atlas
+        self.types = {type.__name__: type for type in [ObjectBase] + self.atlas.types}
+
+        self.data: dict | None = None
+
+    def get_types(self) -> list[str]:
+        return [type.__name__ for type in self.atlas.types]
+
+    # files listed by the scan: one added, removed or overwritten in place changes its size or mtime
+    @staticmethod
+    def get_hash(entries: list) -> str:
+        digest = hashlib.sha1()
+        for entry in sorted(entries, key=lambda entry: entry.filename):
+            digest.update("{}:{}:{};".format(entry.filename, entry.size, entry.mtime).encode())
+        return digest.hexdigest()
+
+    def read(self) -> dict | None:
+        if self.data is None and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as file:
+                    self.data = json.load(file)
+            except (OSError, ValueError):
+                self.data = None
+        return self.data
+
+    # discovered entries completed for registration, None when the assets (or the registered classes) changed
+    def load(self, entries: list) -> list | None:
+        data = self.read()
+        if data is None or data.get('version') != AssetManifest.VERSION or data.get('types') != self.get_types():
+            return None
+        if data.get('hash') != AssetManifest.get_hash(entries):
+            return None
+
+        return self.to_entries(data, entries)
+
+    def to_entries(self, data: dict, entries: list) -> list | None:
+        files = {entry.filename: entry for entry in entries}
+
+        loaded = []
+        for filename, group, frame, classname, role in data['files']:
+            classbase = self.types.get(classname)
+            entry = files.get(filename)
+            if classbase is None or entry is None:
+                return None
+
+            entry.group = group
+            entry.frame = frame
+            entry.classbase = classbase
+            entry.role = role
+            loaded.append(entry)
+        return loaded
+
+    def save(self, entries: list):
+        data = {
+            'version': AssetManifest.VERSION,
+            'types': self.get_types(),
+            'hash': AssetManifest.get_hash(entries),
+            'files': [[entry.filename, entry.group, entry.frame, entry.classbase.__name__, entry.role]
+                      for entry in entries]
+        }
+
+        try:
+            temp = self.path + ".tmp"
+            with open(temp, 'w') as file:
+                json.dump(data, file)
+            os.replace(temp, self.path)
+            self.data = data
+        except OSError as e:
+            print(e)
@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class NullScope:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class ProfileScope:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.profiler.add(self.name, self.start, time.perf_counter())
+        return False
+
+
+class FrameProfiler:
+    ENV = "DUNGEON_PROFILE"  # any value but "0" enables it
+    HISTORY = 600  # durations kept per scope
+    TRACE_EVENTS = 100_000  # events kept for the trace export
+    TRACE_FILE = "profile.trace.json"
+    NULL_SCOPE = NullScope()
+
+    def __init__(self) -> None:
+        self.enabled = os.environ.get(FrameProfiler.ENV, "0") not in ("", "0")
+
+        # ring buffers, deque appends need no lock (any thread)
+        self.durations: dict[str, deque] = {}
+        self.events: deque = deque(maxlen=FrameProfiler.TRACE_EVENTS)
+        self.threads: dict[int, str] = {}
+        self.origin = time.perf_counter()
+
+        self.last_sample = 0.0
+        self.summary: dict[str, tuple[float, float, float]] = {}
+
+    def enable(self, enabled: bool = True):
+        self.enabled = enabled
+
+    def clear(self):
+        self.durations = {}
+        self.events.clear()
+        self.summary = {}
+
+    # with PROFILER.scope("name"): ..., a shared no-op scope while disabled
+    def scope(self, name: str):
+        if not self.enabled:
+            return FrameProfiler.NULL_SCOPE
+        return ProfileScope(self, name)
+
+    def add(self, name: str, start: float, end: float):
+        durations = self.durations.get(name)
+        if durations is None:
+            durations = self.durations[name] = deque(maxlen=FrameProfiler.HISTORY)
+        durations.append(end - start)
+
+        thread = threading.get_ident()
+        if thread not in self.threads:
+            self.threads[thread] = threading.current_thread().name
+        self.events.append((name, thread, start, end))
+
+    # frame time from the window dt, no trace event
+    def add_frame(self, dt: float):
+        if self.enabled:
+            durations = self.durations.get("frame")
+            if durations is None:
+                durations = self.durations["frame"] = deque(maxlen=FrameProfiler.HISTORY)
+            durations.append(dt)
+
+    @staticmethod
+    def get_percentiles(durations) -> tuple[float, float, float]:
+        values = sorted(durations)
+        if len(values) == 0:
+            return (0.0, 0.0, 0.0)
+        return tuple(values[min(len(values) - 1, int(len(values) * ratio))] * 1000 for ratio in (0.5, 0.95, 0.99))
+
+    # p50/p95/p99 in ms of each scope, refreshed at most twice per second
+    def get_summary(self) -> dict[str, tuple[float, float, float]]:
+        now = time.perf_counter()
+        if now - self.last_sample >= 0.5:
+            # tuple() copies a deque without running python code, other threads can't append meanwhile
+            self.summary = {name: FrameProfiler.get_percentiles(tuple(durations)) for name, durations in sorted(self.durations.items())}
+            self.last_sample = now
+        return self.summary
+
+    # lines for the Stats overlays
+    def get_lines(self) -> dict[str, str]:
+        return {name: "p50 {:.2f} / p95 {:.2f} / p99 {:.2f} ms".format(*percentiles) for name, percentiles in self.get_summary().items()}
+
+    # chrome://tracing or ui.perfetto.dev, complete events of every thread
+    def to_trace(self) -> dict:
+        pid = os.getpid()
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": thread, "args": {"name": name}}
+                  for thread, name in list(self.threads.items())]
+        events += [{"name": name, "ph": "X", "pid": pid, "tid": thread,
+                    "ts": (start - self.origin) * 1_000_000, "dur": (end - start) * 1_000_000}
+                   for name, thread, start, end in tuple(self.events)]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_trace(self, path: str = TRACE_FILE) -> bool:
+        try:
+            temp = path + ".tmp"
+            with open(temp, 'w') as file:
+                json.dump(self.to_trace(), file)
+            os.replace(temp, path)
+            return True
+        except OSError as e:
+            print(e)
+            return False
+
+
+PROFILER = FrameProfiler()
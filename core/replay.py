@@ -0,0 +1,324 @@
+import gzip
+import os
+import random
+import struct
+import zlib
+from dataclasses import dataclass
+
+from BTP.BTP import *
+from BTP.gui import Input
+from core.system import ANIMATION_CLOCK
+from utility import Keyboard
+
+
+class InputFileError(Exception):
+    pass
+
+
+@dataclass
+class InputFrame:
+    dt: float = 0.0
+    down: int = 0  # bit masks over the session keys
+    pressed: int = 0
+    mouse_x: float = 0.0
+    mouse_y: float = 0.0
+    mouse: int = 0  # InputSession.MOUSE_* flags
+    wheel: float = 0.0
+    key_codes: tuple[int, ...] = ()  # non zero get_key_code results, in call order
+
+
+# input recording: gzip stream of a header then one record per frame
+class InputSession:
+    MAGIC = b"PDIN"
+    VERSION = 1
+    EXTENSION = ".input"
+
+    HEADER = struct.Struct("<4sHQHHHI")  # magic, version, seed, render width, render height, keys, info bytes
+    KEY = struct.Struct("<H")
+    FRAME = struct.Struct("<dffBfB")  # dt (exact), mouse x, mouse y, mouse flags, wheel, key codes
+    KEY_CODE = struct.Struct("<H")
+
+    MOUSE_DOWN = 1
+    MOUSE_PRESSED = 2
+    MOUSE_RELEASED = 4
+
+    # every key the game and the gui read
+    KEYS = tuple(sorted({val for key, val in vars(Keyboard).items() if isinstance(val, int)} | set(Input.KEYS) | {Input.DELETE}))
+
+    def __init__(self, btp: Win, path: str) -> None:
+        self.btp = btp
+        self.path = path
+
+        self.seed = 0
+        self.keys: tuple[int, ...] = InputSession.KEYS
+        self.info = ""  # free text (runner options...)
+        self.render_size = (0, 0)
+
+        self.frame_index = 0
+        self.dt = 0.0
+
+    def get_mask_size(self) -> int:
+        return (len(self.keys) + 7) // 8
+
+    # each frame draws from its own seed, randomness used by other threads never shifts the next frames
+    def seed_frame(self):
+        random.seed(self.seed * 1_000_003 + self.frame_index)
+
+    # animations (spike traps...) follow the clock, every session starts it over
+    def start(self):
+        random.seed(self.seed)
+        ANIMATION_CLOCK.reset()
+
+    def next_frame(self, dt: float) -> float:
+        return dt
+
+    def close(self):
+        pass
+
+
+class InputRecorder(InputSession):
+
+    def __init__(self, btp: Win, path: str, seed: int | None = None, info: str = "") -> None:
+        super().__init__(btp, path)
+        self.seed = seed if seed is not None else int.from_bytes(os.urandom(8), 'little') >> 1
+        self.info = info
+
+        self.file = None
+        self.frame: InputFrame | None = None
+        self.key_codes: list[int] = []
+        self.get_key_code = None
+
+    def start(self):
+        super().start()
+        self.file = gzip.open(self.path, 'wb')
+
+        # get_key_code pops the key queue: the codes are recorded while the game reads them
+        self.get_key_code = self.btp.get_key_code
+        self.btp.get_key_code = self.read_key_code
+
+    def read_key_code(self) -> int:
+        code = self.get_key_code()
+        if code != 0:
+            self.key_codes.append(code)
+        return code
+
+    # the window size is only known once it is open
+    def write_header(self):
+        size = self.btp.get_render_size()
+        self.render_size = (int(size.x), int(size.y))
+        info = self.info.encode()
+
+        self.file.write(InputSession.HEADER.pack(InputSession.MAGIC, InputSession.VERSION, self.seed,
+                                                 self.render_size[0], self.render_size[1], len(self.keys), len(info)))
+        for key in self.keys:
+            self.file.write(InputSession.KEY.pack(key))
+        self.file.write(info)
+
+    def write_frame(self):
+        frame = self.frame
+        mask_size = self.get_mask_size()
+        self.file.write(InputSession.FRAME.pack(frame.dt, frame.mouse_x, frame.mouse_y, frame.mouse, frame.wheel, len(self.key_codes)))
+        self.file.write(frame.down.to_bytes(mask_size, 'little') + frame.pressed.to_bytes(mask_size, 'little'))
+        for code in self.key_codes:
+            self.file.write(InputSession.KEY_CODE.pack(code))
+        self.key_codes.clear()
+
+    # render thread, before the frame: the previous frame is complete (key codes)
+    def next_frame(self, dt: float) -> float:
+        if self.file is None:
+            return dt
+
+        if self.frame is None:
+            self.write_header()
+        else:
+            self.write_frame()
+
+        btp = self.btp
+        down = pressed = 0
+        for bit, key in enumerate(self.keys):
+            if btp.is_key_down(key):
+                down |= 1 << bit
+            if btp.is_key_pressed(key):
+                pressed |= 1 << bit
+
+        mouse = (InputSession.MOUSE_DOWN if btp.is_mouse_down() else 0) | \
+            (InputSession.MOUSE_PRESSED if btp.is_mouse_pressed() else 0) | \
+            (InputSession.MOUSE_RELEASED if btp.is_mouse_release() else 0)
+        position = btp.mouse
+        self.frame = InputFrame(dt, down, pressed, position.x, position.y, mouse, btp.wheel)
+
+        self.frame_index += 1
+        self.seed_frame()
+        self.dt = dt
+        return dt
+
+    def close(self):
+        if self.file is None:
+            return
+
+        try:
+            if self.frame is not None:
+                self.write_frame()
+            self.file.close()
+        except OSError as e:
+            print(e)
+        self.file = None
+        self.btp.__dict__.pop("get_key_code", None)
+
+
+class InputReplayer(InputSession):
+    QUERIES = ("is_key_down", "is_key_up", "is_key_pressed", "is_key_release", "get_key_code",
+               "is_mouse_down", "is_mouse_up", "is_mouse_pressed", "is_mouse_release")
+    GZIP_WBITS = 16 + zlib.MAX_WBITS  # gzip header and trailer
+
+    # stop_at_end: the window closes after the last frame (two builds run the same session)
+    def __init__(self, btp: Win, path: str, stop_at_end: bool = True) -> None:
+        super().__init__(btp, path)
+        self.stop_at_end = stop_at_end
+
+        self.frames: list[InputFrame] = []
+        self.bits: dict[int, int] = {}
+        self.frame = InputFrame()
+        self.previous = InputFrame()
+        self.key_codes: list[int] = []
+
+        self.win_class = None
+        self.finished = False
+
+    # the decompressed bytes up to the end of the stream, or up to where a crashed recording was cut
+    def read_data(self) -> tuple[bytes, bool]:
+        with open(self.path, 'rb') as file:
+            raw = file.read()
+
+        stream = zlib.decompressobj(InputReplayer.GZIP_WBITS)
+        try:
+            data = stream.decompress(raw)
+        except zlib.error:
+            raise InputFileError("{}: not an input recording".format(self.path))
+        return data, not stream.eof
+
+    def read(self):
+        data, truncated = self.read_data()
+
+        try:
+            magic, version, self.seed, width, height, keys, info = InputSession.HEADER.unpack_from(data)
+        except struct.error:
+            raise InputFileError("{}: not an input recording".format(self.path))
+        if magic != InputSession.MAGIC or version != InputSession.VERSION:
+            raise InputFileError("{}: unsupported input recording".format(self.path))
+
+        offset = InputSession.HEADER.size
+        if offset + keys * InputSession.KEY.size + info > len(data):
+            raise InputFileError("{}: truncated input recording".format(self.path))
+        self.render_size = (width, height)
+        self.keys = tuple(InputSession.KEY.unpack_from(data, offset + i * InputSession.KEY.size)[0] for i in range(keys))
+        offset += keys * InputSession.KEY.size
+        self.info = data[offset:offset + info].decode()
+        offset += info
+
+        mask_size = self.get_mask_size()
+        self.frames = []
+        while offset < len(data):
+            # a frame cut by a crash ends the recording
+            if offset + InputSession.FRAME.size + mask_size * 2 > len(data):
+                truncated = True
+                break
+            dt, mouse_x, mouse_y, mouse, wheel, codes = InputSession.FRAME.unpack_from(data, offset)
+            end = offset + InputSession.FRAME.size + mask_size * 2 + codes * InputSession.KEY_CODE.size
+            if end > len(data):
+                truncated = True
+                break
+
+            offset += InputSession.FRAME.size
+            down = int.from_bytes(data[offset:offset + mask_size], 'little')
+            pressed = int.from_bytes(data[offset + mask_size:offset + mask_size * 2], 'little')
+            offset += mask_size * 2
+            key_codes = tuple(InputSession.KEY_CODE.unpack_from(data, offset + i * InputSession.KEY_CODE.size)[0] for i in range(codes))
+            offset = end
+            self.frames.append(InputFrame(dt, down, pressed, mouse_x, mouse_y, mouse, wheel, key_codes))
+
+        if truncated:
+            print("{}: truncated input recording, {} frames".format(self.path, len(self.frames)))
+        self.bits = {key: bit for bit, key in enumerate(self.keys)}
+
+    def start(self):
+        self.read()
+        super().start()
+        self.attach()
+
+    # the window queries are shadowed on the instance, mouse and wheel (properties) through a subclass
+    def attach(self):
+        for name in InputReplayer.QUERIES:
+            setattr(self.btp, name, getattr(self, name))
+
+        replayer = self
+        self.win_class = type(self.btp)
+        self.btp.__class__ = type(self.win_class.__name__, (self.win_class,), {
+            "mouse": property(lambda btp: Vec(replayer.frame.mouse_x, replayer.frame.mouse_y)),
+            "wheel": property(lambda btp: replayer.frame.wheel)
+        })
+
+    def detach(self):
+        for name in InputReplayer.QUERIES:
+            self.btp.__dict__.pop(name, None)
+        if self.win_class is not None:
+            self.btp.__class__ = self.win_class
+            self.win_class = None
+
+    # the recorded dt replaces the real one, live input once the recording ends
+    def next_frame(self, dt: float) -> float:
+        if self.frame_index >= len(self.frames):
+            if not self.finished:
+                self.finished = True
+                self.detach()
+                if self.stop_at_end:
+                    self.btp.stop()
+            return dt
+
+        if self.frame_index == 0:
+            size = self.btp.get_render_size()
+            if (int(size.x), int(size.y)) != self.render_size:
+                print("{}: recorded at {}x{}, the views differ".format(self.path, *self.render_size))
+
+        self.previous = self.frame
+        self.frame = self.frames[self.frame_index]
+        self.key_codes = list(self.frame.key_codes)
+
+        self.frame_index += 1
+        self.seed_frame()
+        self.dt = self.frame.dt
+        return self.dt
+
+    def close(self):
+        self.detach()
+
+    def is_key(self, mask: int, key: int) -> bool:
+        bit = self.bits.get(key)
+        return bit is not None and (mask >> bit) & 1 == 1
+
+    def is_key_down(self, key: int) -> bool:
+        return self.is_key(self.frame.down, key)
+
+    def is_key_up(self, key: int) -> bool:
+        return not self.is_key(self.frame.down, key)
+
+    def is_key_pressed(self, key: int) -> bool:
+        return self.is_key(self.frame.pressed, key)
+
+    def is_key_release(self, key: int) -> bool:
+        return self.is_key(self.previous.down, key) and not self.is_key(self.frame.down, key)
+
+    def get_key_code(self) -> int:
+        return self.key_codes.pop(0) if len(self.key_codes) != 0 else 0
+
+    def is_mouse_down(self) -> bool:
+        return self.frame.mouse & InputSession.MOUSE_DOWN != 0
+
+    def is_mouse_up(self) -> bool:
+        return self.frame.mouse & InputSession.MOUSE_DOWN == 0
+
+    def is_mouse_pressed(self) -> bool:
+        return self.frame.mouse & InputSession.MOUSE_PRESSED != 0
+
+    def is_mouse_release(self) -> bool:
+        return self.frame.mouse & InputSession.MOUSE_RELEASED != 0
@@ -1,5 +1,6 @@
 from BTP.BTP import *
 from typing import Any, Protocol, Self, runtime_checkable, Optional
+from functools import cache
 import copy
 
 from utility import SCALE, timedbg
@@ -9,12 +10,14 @@ class Texture:
     def __init__(self) -> None:
         self.texture: int
         self.name: str
+        self.role: str | None = None  # animation state from the asset manifest, None: not classified
 
 
 class AnimatedTexture:
     def __init__(self) -> None:
         self.textures: list[int]
         self.textures_names: list[str]
+        self.textures_roles: list[str | None] = []  # per frame, like textures_names
         self.name: str
 
 
@@ -22,36 +25,76 @@ class TextureAtlas:
 
     def __init__(self) -> None:
         self.textures: list[Texture | AnimatedTexture] = []
+        self.index: dict[str, Texture | AnimatedTexture] = {}
+
+    def get(self, name: str) -> Texture | AnimatedTexture | None:
+        return self.index.get(name)
+
+    # texture id -> (texture name, frame), the same in every run and on every backend
+    def get_keys(self) -> dict[int, tuple[str, int]]:
+        keys = {}
+        for texture in self.textures:
+            if isinstance(texture, AnimatedTexture):
+                keys.update((texture_id, (texture.name, frame)) for frame, texture_id in enumerate(texture.textures))
+            else:
+                keys[texture.texture] = (texture.name, 0)
+        return keys
+
+    def get_texture_id(self, name: str, frame: int = 0) -> int | None:
+        texture = self.index.get(name)
+        if texture is None:
+            return None
+        if isinstance(texture, AnimatedTexture):
+            return texture.textures[frame] if frame < len(texture.textures) else None
+        return texture.texture if frame == 0 else None
 
     def add(self, filename: str, texture_id: int):
         parts = filename.split('_')
 
         if len(parts) >= 3 and parts[-1].startswith('f') and parts[-2].lower() == 'anim':
-            name = "_".join(parts[:-2])
-            for texture in self.textures:
-                if texture.name == name:
-                    texture.textures.append(texture_id)
-                    texture.textures_names.append(filename)
-                    break
+            self.add_entry("_".join(parts[:-2]), filename, texture_id, True)
+            return
+
+        self.add_entry(filename.replace('.png', ""), filename, texture_id, False)
+
+    # filename already parsed into its group name and role (asset loader)
+    def add_entry(self, name: str, filename: str, texture_id: int, animated: bool, role: str | None = None):
+        if animated:
+            texture = self.index.get(name)
+            if texture is not None:
+                texture.textures.append(texture_id)
+                texture.textures_names.append(filename)
+                texture.textures_roles.append(role)
             else:
                 texture = AnimatedTexture()
                 texture.name = name
                 texture.textures = [texture_id]
                 texture.textures_names = [filename]
+                texture.textures_roles = [role]
                 self.textures.append(texture)
+                self.index[name] = texture
             return
 
-        name = filename.replace('.png', "")
         texture = Texture()
         texture.name = name
         texture.texture = texture_id
+        texture.role = role
         self.textures.append(texture)
+        self.index.setdefault(name, texture)
 
 
 def is_animated(texture: Texture | AnimatedTexture):
     return isinstance(texture, AnimatedTexture) and hasattr(texture, 'textures')
 
 
+# frame roles of an animated texture, None for the frames the manifest did not classify
+def get_roles(texture: AnimatedTexture) -> tuple[str | None, ...]:
+    roles = getattr(texture, 'textures_roles', ())
+    if len(roles) != len(texture.textures_names):
+        return (None,) * len(texture.textures_names)
+    return tuple(roles)
+
+
 def to_animated(texture: Texture | AnimatedTexture):
     if is_animated(texture):
         return texture
@@ -59,13 +102,79 @@ def to_animated(texture: Texture | AnimatedTexture):
         animated = AnimatedTexture()
         animated.name = texture.name
         animated.textures_names = [texture.name]
+        animated.textures_roles = [getattr(texture, 'role', None)]
         animated.textures = [texture.texture]
         return animated
 
 
+@cache
+def get_slots(classbase) -> tuple[str, ...]:
+    return tuple(name for base in reversed(classbase.__mro__) for name in base.__dict__.get('__slots__', ())
+                 if name != '__dict__' and name != '__weakref__')
+
+
+class TilePrototype:
+
+    # shared by every tile of one atlas object, read only once the atlas is built
+    def __init__(self, base) -> None:
+        self.base: ObjectBase = base
+        self.classbase = type(base)
+        self.texture: Texture | AnimatedTexture = base.texture
+        self.frames: tuple[int, ...] = tuple(base.texture.textures) if is_animated(base.texture) else (base.texture.texture,)
+        self.states: dict[str, tuple[int, ...]] = self.classbase.get_states(base.texture)
+
+    @property
+    def size(self) -> Vec:
+        return self.base.size
+
+    # tiles only hold their own state, anything else is read from the prototype base
+    def spawn(self, position: Vec, flip: Vec | None, collision: bool):
+        tile = self.classbase.__new__(self.classbase)
+        tile.prototype = self
+        tile.position = position
+        tile.collision = collision
+        # unflipped tiles (or None) share the prototype flip
+        if flip is not None and flip != self.base.flip:
+            tile.flip = flip
+        return tile
+
+
+class AnimationClock:
+
+    # one clock for every animated object, frames are computed once per tick
+    def __init__(self) -> None:
+        self.time: float = 0.0
+        self.indexes: dict[tuple[int, float], int] = {}
+
+    def tick(self, dt: float):
+        self.time += dt
+        self.indexes.clear()
+
+    def reset(self):
+        self.time = 0.0
+        self.indexes.clear()
+
+    def get_index(self, count: int, speed: float, phase: float = 0.0) -> int:
+        if phase != 0:
+            return int(self.time * speed + phase) % count
+
+        # tiles with the same frame count and speed share their index (and stay in phase)
+        key = (count, speed)
+        index = self.indexes.get(key)
+        if index is None:
+            index = self.indexes[key] = int(self.time * speed) % count
+        return index
+
+
+ANIMATION_CLOCK = AnimationClock()
+
+
 class ObjectBase:
+    __slots__ = ('prototype', 'texture', 'name', 'position', 'size', 'flip', 'origin', 'angle',
+                 'animation_speed', 'animation_index', 'animation_phase', 'collision')
 
     def __init__(self, texture: Texture | AnimatedTexture) -> None:
+        self.prototype: TilePrototype | None = None
         self.texture: Texture | AnimatedTexture = texture
         self.name: str = self.texture.name
 
@@ -77,6 +186,7 @@ class ObjectBase:
 
         self.animation_speed: float = 10.0
         self.animation_index: float = 0.0
+        self.animation_phase: float = 0.0  # offset in frames from the animation clock
 
         self.collision: bool = False
 
@@ -91,13 +201,49 @@ class ObjectBase:
     @staticmethod
     def check_name(name: str) -> bool:
         return True
-    
+
+    # animation state a texture file stands for, for classes grouping several states
+    @staticmethod
+    def get_role(filename: str) -> str:
+        return ""
+
+    # frames of every animation state, built once per atlas object with its prototype
+    @classmethod
+    def get_states(cls, texture: Texture | AnimatedTexture) -> dict[str, tuple[int, ...]]:
+        return {}
+
+    def __getattr__(self, name: str) -> Any:
+        if name == 'prototype':
+            raise AttributeError(name)
+
+        prototype = self.prototype
+        if prototype is None or prototype.base is self:
+            raise AttributeError(name)
+        return getattr(prototype.base, name)
+
+    # slots (and __dict__ for subclasses without slots) actually set on this object
+    def get_state(self) -> dict[str, Any]:
+        state = {}
+        for name in get_slots(type(self)):
+            try:
+                state[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+
+        try:
+            state.update(object.__getattribute__(self, '__dict__'))
+        except AttributeError:
+            pass
+        return state
+
     def copy(self):
         classbase = type(self)
-        cp = classbase(copy.deepcopy(self.texture))
+        cp = classbase.__new__(classbase)
     
-        for attr_name, attr in vars(self).items():
-            if callable(attr) or attr is None:
+        for attr_name, attr in self.get_state().items():
+            # the texture and the prototype are shared, never cloned
+            if attr_name == 'texture' or attr_name == 'prototype' or callable(attr) or attr is None:
+                setattr(cp, attr_name, attr)
                 continue
             
             try:
@@ -115,49 +261,94 @@ class ObjectBaseAtlas:
         self.types: list[ObjectBase] = []
         self.objects: list[ObjectBase] = []
 
+        # (class, name) for the object class and every ObjectBase parent class, first added wins
+        self.index: dict[tuple[type, str], ObjectBase] = {}
+        self.names: dict[str, ObjectBase] = {}
+        self.instances: dict[type, list[ObjectBase]] = {}
+
     def register(self, object: ObjectBase):
         self.types.append(object)
+        self.instances.clear()
+
+    def append(self, obj: ObjectBase) -> ObjectBase:
+        self.objects.append(obj)
+        self.names.setdefault(obj.name, obj)
+        for classbase in type(obj).__mro__:
+            if issubclass(classbase, ObjectBase):
+                self.index.setdefault((classbase, obj.name), obj)
+
+        self.instances.clear()
+        return obj
+
+    def get(self, name: str) -> ObjectBase | None:
+        return self.names.get(name)
+
+    def find(self, classbase, name: str) -> ObjectBase | None:
+        return self.index.get((classbase, name))
 
     def __add_single(self, type: ObjectBase, texture: AnimatedTexture | Texture, grpname: str) -> ObjectBase:
         animated = to_animated(texture)
-        for obj in self.objects:
-            if isinstance(obj, type) and obj.name == grpname:
-                obj.texture.textures_names += animated.textures_names
-                obj.texture.textures += animated.textures
-                return obj
-        else:
-            obj = type(animated)
-            self.objects.append(obj)
+        obj = self.index.get((type, grpname))
+        if obj is not None:
+            obj.texture.textures_roles = list(get_roles(obj.texture)) + list(get_roles(animated))
+            obj.texture.textures_names += animated.textures_names
+            obj.texture.textures += animated.textures
             return obj
 
-    def add(self, texture: AnimatedTexture | Texture) -> ObjectBase:
-        ref = None
+        return self.append(type(animated))
+
+    def get_type(self, name: str):
         for type in self.types:
-            if type.check_name(texture.name):
-                if type.is_grouped():
-                    ref = self.__add_single(
-                        type, texture, type.get_group_name(texture.name))
-                else:
-                    ref = type(texture)
-                    self.objects.append(ref)
-                break
-        else:
-            ref = ObjectBase(texture)
-            self.objects.append(ref)
-        return ref
+            if type.check_name(name):
+                return type
+        return ObjectBase
 
-    def copy(self, classbase, name) -> None | ObjectBase:
-        for obj in self.objects:
-            if isinstance(obj, classbase) and obj.name == name:
-                return obj.copy()
-        return None
+    def add(self, texture: AnimatedTexture | Texture, type = None) -> ObjectBase:
+        if type is None:
+            type = self.get_type(texture.name)
+
+        if type.is_grouped():
+            return self.__add_single(type, texture, type.get_group_name(texture.name))
+
+        return self.append(type(texture))
 
+    def copy(self, classbase, name) -> None | ObjectBase:
+        obj = self.index.get((classbase, name))
+        return obj.copy() if obj is not None else None
+
+    def spawn(self, classbase, name, position: Vec, flip: Vec, collision: bool) -> None | ObjectBase:
+        obj = self.index.get((classbase, name))
+        if obj is None:
+            return None
+
+        if obj.prototype is None:
+            tile = obj.copy()
+            tile.position = position
+            tile.flip = flip
+            tile.collision = collision
+            return tile
+        return obj.prototype.spawn(position, flip, collision)
+
+    # cached until the next registration, callers must not modify it
     def from_instance(self, classbase) -> list[Any]:
-        return [obj for obj in self.objects if isinstance(obj, classbase)]
+        objects = self.instances.get(classbase)
+        if objects is None:
+            objects = self.instances[classbase] = [obj for obj in self.objects if isinstance(obj, classbase)]
+        return objects
+
+    # freeze the frame tables and create the shared prototypes, once every texture is added
+    def build(self):
+        for obj in self.objects:
+            if is_animated(obj.texture):
+                obj.texture.textures = tuple(obj.texture.textures)
+                obj.texture.textures_names = tuple(obj.texture.textures_names)
+                obj.texture.textures_roles = tuple(get_roles(obj.texture))
+            obj.prototype = TilePrototype(obj)
 
 
 @runtime_checkable
 class Component(Protocol):
+    __slots__ = ()
 
     def on_draw(self, dt: float) -> None: ...
 
@@ -177,10 +368,11 @@ class ActionEvent:
 
 
 class ActionObject(ObjectBase):
+    __slots__ = ('accepted_actions',)
 
     def __init__(self, texture: Texture | AnimatedTexture) -> None:
         super().__init__(texture)
-        self.accepted_actions: list[str] = []
+        self.accepted_actions: tuple[str, ...] = ()
 
     def accept_action(self, name):
         return name in self.accepted_actions
@@ -195,6 +387,7 @@ class ActionObject(ObjectBase):
 
 
 class ComponentObject(ActionObject, Component):
+    __slots__ = ('btp',)
 
     def __init__(self, texture: Texture | AnimatedTexture) -> None:
         super().__init__(texture)
@@ -203,6 +396,13 @@ class ComponentObject(ActionObject, Component):
     def on_action(self, action: ActionEvent) -> Any:
         return None
 
+    # objects reacting to actions must keep their own collider (not merged with walls)
+    def has_action(self) -> bool:
+        return type(self).on_action is not ComponentObject.on_action
+
+    def get_animation_index(self) -> int:
+        return ANIMATION_CLOCK.get_index(len(self.texture.textures), self.animation_speed, self.animation_phase)
+
     def get_frame(self, dt: float) -> int:
         if not is_animated(self.texture):
             return self.texture.texture
@@ -210,6 +410,10 @@ class ComponentObject(ActionObject, Component):
         if len(self.texture.textures) <= 0:
             return
 
+        return self.texture.textures[self.get_animation_index() - 1]
+
+    # playback owned by the object (started on its own), instead of the shared clock
+    def advance_frame(self, dt: float) -> int:
         frame = int(self.animation_index) % len(self.texture.textures)
         self.animation_index += dt * self.animation_speed
 
@@ -0,0 +1 @@
+from headless.win import Win, Vec, Color, install, read_png_size
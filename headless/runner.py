@@ -0,0 +1,253 @@
+import argparse
+import json
+import random
+import sys
+import time
+
+from headless.win import install
+
+install()  # before the game modules import BTP.BTP
+
+from BTP.BTP import *
+from core import PROFILER, InputSession, InputRecorder, InputReplayer, InputFileError
+from components import Character, Floor, Wall
+from components.character import CharacterData
+from map import Chunk, ChunkData, TileData
+from utility import TILE_SIZE, DungeonScreens, DungeonActionData, DungeonRoleTypes, Keyboard
+
+from main import Dungeon
+
+
+class KeyScript:
+    # (ticks, keys held down) segments, played in a loop
+    PATROL = (
+        (90, (Keyboard.RIGHT,)),
+        (90, (Keyboard.DOWN,)),
+        (90, (Keyboard.LEFT,)),
+        (90, (Keyboard.UP,)),
+        (30, ())
+    )
+
+    def __init__(self, segments=PATROL) -> None:
+        self.segments: tuple[tuple[int, tuple[int, ...]], ...] = tuple(segments)
+        self.length = sum(ticks for ticks, keys in self.segments)
+
+    def get_keys(self, tick: int) -> tuple[int, ...]:
+        if self.length == 0:
+            return ()
+
+        tick %= self.length
+        for ticks, keys in self.segments:
+            if tick < ticks:
+                return keys
+            tick -= ticks
+        return ()
+
+    # "right+up:60,none:30", key names of utility.Keyboard
+    @staticmethod
+    def parse(text: str) -> 'KeyScript':
+        segments = []
+        for segment in text.split(","):
+            names, ticks = segment.split(":")
+            keys = tuple(getattr(Keyboard, name.strip().upper()) for name in names.split("+") if name.strip().lower() != "none")
+            segments.append((int(ticks), keys))
+        return KeyScript(segments)
+
+
+# size² tiles room, chunk by chunk: walls around, floor and spike traps inside
+def iter_room(size: int):
+    for cy in range(-(-size // Chunk.DEFAULT_SIZE)):
+        for cx in range(-(-size // Chunk.DEFAULT_SIZE)):
+            chunk = ChunkData()
+            chunk.position = Chunk.from_key((cx, cy))
+            for i in range(Chunk.DEFAULT_SIZE ** 2):
+                x = cx * Chunk.DEFAULT_SIZE + i % Chunk.DEFAULT_SIZE
+                y = cy * Chunk.DEFAULT_SIZE + i // Chunk.DEFAULT_SIZE
+                if x >= size or y >= size:
+                    continue
+
+                border = x == 0 or y == 0 or x == size - 1 or y == size - 1
+                spikes = not border and (x * 7 + y * 13) % 41 == 0
+
+                tile = TileData()
+                tile.object = Wall if border else Floor
+                tile.name = "wall_mid" if border else ("floor_spikes" if spikes else "floor_1")
+                tile.position = Vec(x, y) * TILE_SIZE
+                tile.flip = Vec(1)
+                tile.collision = border or spikes
+                chunk.tiles.append(tile)
+            yield chunk
+
+
+# the game screen without a window: view updates, entities control and actions on the calling thread
+class HeadlessRunner:
+    DT = 1 / 60
+
+    # session: input recorder or replayer, started before on_ready draws the player skin
+    def __init__(self, script: KeyScript | None = None, session: InputSession | None = None) -> None:
+        self.dungeon = Dungeon()
+        self.dungeon.set_frame_locked()
+        if session is not None:
+            session.btp = self.dungeon
+            session.start()
+            if isinstance(session, InputReplayer):
+                self.dungeon.render_size = Vec(*session.render_size)
+            self.dungeon.input_session = session
+
+        self.dungeon.on_load()
+        self.dungeon.on_ready()
+        self.dungeon.state = DungeonScreens.GAME
+
+        self.game = self.dungeon.game
+        self.map = self.game.map
+        self.script = script if script is not None else KeyScript()
+
+        self.ticks = 0
+        self.game_overs = 0
+
+    def create_character(self, name: str, position: Vec, role: str) -> CharacterData:
+        data = CharacterData()
+        data.name = name
+        data.plugin_name = "control"
+        data.position = position
+        data.action_data = DungeonActionData(role=role)
+        return data
+
+    # player in the center, entities anywhere inside the room
+    def get_characters(self, size: int, entities: int) -> tuple[CharacterData, list[CharacterData]]:
+        names = [character.name for character in self.map.atlas.from_instance(Character)]
+        player = self.create_character(random.choice(["knight_m", "knight_f"]), Vec(size / 2) * TILE_SIZE, DungeonRoleTypes.PLAYER)
+        return player, [self.create_character(random.choice(names), Vec(random.uniform(2, size - 3), random.uniform(2, size - 3)) * TILE_SIZE, DungeonRoleTypes.MONSTER)
+                        for i in range(entities)]
+
+    def generate(self, size: int, entities: int):
+        for chunk in iter_room(size):
+            self.map.load_chunk(chunk)
+        self.map.load_entities(*self.get_characters(size, entities))
+
+    # name: saved map, None: generated room
+    def load(self, name: str | None = None, size: int = 64, entities: int = 16):
+        self.map.clear_map()
+        if name is not None:
+            self.map.load_map(name)
+        else:
+            self.generate(size, entities)
+        self.map.force_update_view()
+
+    def tick(self, dt: float):
+        self.dungeon.set_keys(self.script.get_keys(self.ticks))
+        self.dungeon.frame(dt)
+
+        # game over: the run goes on with a healed player
+        if self.dungeon.state != DungeonScreens.GAME:
+            self.game_overs += 1
+            self.map.player_ref.life = 100
+            self.dungeon.state = DungeonScreens.GAME
+        self.ticks += 1
+
+    # fixed dt, as fast as possible
+    def run(self, ticks: int, dt: float = DT) -> dict:
+        if self.map.pager is not None:
+            self.map.pager.start()
+
+        start_time = time.perf_counter()
+        try:
+            for i in range(ticks):
+                self.tick(dt)
+        finally:
+            total_time = time.perf_counter() - start_time
+            if self.map.pager is not None:
+                self.map.pager.stop()
+
+        return {
+            "ticks": ticks,
+            "dt": dt,
+            "seconds": total_time,
+            "ticks_per_s": ticks / total_time if total_time != 0 else 0,
+            "realtime": ticks * dt / total_time if total_time != 0 else 0,
+            "chunks": len(self.map.map),
+            "entities": len(self.map.entities_refs),
+            "view_tiles": self.map.frame_view.tile_count,
+            "game_overs": self.game_overs
+        }
+
+
+def main(args):
+    parser = argparse.ArgumentParser(prog="python -m headless.runner", description="Run the game logic without a window.")
+    parser.add_argument("ticks", type=int, nargs="?", default=3600)
+    parser.add_argument("--dt", type=float, default=HeadlessRunner.DT)
+    parser.add_argument("--map", help="saved map name, a room is generated without it")
+    parser.add_argument("--size", type=int, default=64, help="generated room size in tiles")
+    parser.add_argument("--entities", type=int, default=16)
+    parser.add_argument("--keys", help="key script, e.g. right:60,down+left:30,none:10")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", action="store_true", help="scope percentiles and " + PROFILER.TRACE_FILE)
+    parser.add_argument("--drawcalls", action="store_true", help="draw calls of the last frame")
+    parser.add_argument("--capture", help="file the draw commands of the last frame are saved to")
+    parser.add_argument("--record", help="input recording of the run (" + InputSession.EXTENSION + ")")
+    parser.add_argument("--replay", help="input recording to run again, its map options and frame count are used")
+    options = parser.parse_args(args)
+
+    if options.profile:
+        PROFILER.enable()
+
+    session = None
+    if options.replay is not None:
+        session = InputReplayer(None, options.replay, stop_at_end=False)
+    elif options.record is not None:
+        info = json.dumps({"map": options.map, "size": options.size, "entities": options.entities})
+        session = InputRecorder(None, options.record, options.seed, info)
+    else:
+        random.seed(options.seed)
+
+    try:
+        runner = HeadlessRunner(KeyScript.parse(options.keys) if options.keys else None, session)
+    except (OSError, InputFileError) as e:
+        print(e)
+        return 1
+    if options.replay is not None:
+        info = json.loads(session.info or "{}")
+        options.map, options.size, options.entities = info.get("map"), info.get("size", options.size), info.get("entities", options.entities)
+        options.ticks = len(session.frames)
+    runner.load(options.map, options.size, options.entities)
+
+    recorder = runner.dungeon.draw_recorder
+    if options.drawcalls or options.capture is not None:
+        recorder.attach()
+    results = runner.run(options.ticks, options.dt)
+    if options.capture is not None:
+        # one more frame, recorded with the arguments of every call
+        recorder.capture(1)
+        runner.tick(options.dt)
+    # closes the last frame, it becomes the summarized one
+    recorder.next_frame()
+    if session is not None:
+        session.close()
+
+    print("headless run ({})".format(options.map if options.map is not None else "{0}x{0} room".format(options.size)))
+    for key, val in results.items():
+        if isinstance(val, float):
+            val = round(val, 4)
+        print("  {}: {}".format(key, val))
+    player = runner.map.player_ref
+    print("  player: {:.2f}, {:.2f} (life {})".format(player.position.x, player.position.y, player.life))
+
+    if PROFILER.enabled:
+        print("profile")
+        for name, line in PROFILER.get_lines().items():
+            print("  {}: {}".format(name, line))
+        PROFILER.save_trace()
+
+    if recorder.attached:
+        summary = recorder.get_summary()
+        for key in ("frame", "calls", "subsystems", "sites", "textures"):
+            print("draw {}".format(key))
+            for name, count in list(summary[key].items())[:10]:
+                print("  {}: {}".format(name, round(count, 2)))
+    if options.capture is not None and recorder.save_capture(options.capture):
+        print("draw commands saved to {}".format(options.capture))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
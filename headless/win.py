@@ -0,0 +1,316 @@
+import math
+import random
+import struct
+import sys
+import types
+
+
+class Color:
+    __slots__ = ('r', 'g', 'b', 'a')
+
+    def __init__(self, r: int, g: int, b: int, a: int) -> None:
+        self.r = r
+        self.g = g
+        self.b = b
+        self.a = a
+
+    def __repr__(self) -> str:
+        return "Color(r={}; g={}; b={}; a={})".format(self.r, self.g, self.b, self.a)
+
+
+class Vec:
+    __slots__ = ('x', 'y')
+    __hash__ = None  # mutable, like the native vector
+
+    def __init__(self, *args) -> None:
+        if len(args) == 0:
+            self.x = self.y = 0.0
+        elif len(args) == 1:
+            if isinstance(args[0], tuple):
+                self.x, self.y = float(args[0][0]), float(args[0][1])
+            else:
+                self.x = self.y = float(args[0])
+        else:
+            self.x, self.y = float(args[0]), float(args[1])
+
+    def is_zero(self) -> bool:
+        return self.x == 0 and self.y == 0
+
+    def random(self, min: float, max: float) -> None:
+        self.x = random.uniform(min, max)
+        self.y = random.uniform(min, max)
+
+    def to_int(self) -> 'Vec':
+        return Vec(int(self.x), int(self.y))
+
+    def __add__(self, other) -> 'Vec':
+        if type(other) is Vec:
+            return Vec(self.x + other.x, self.y + other.y)
+        return Vec(self.x + other, self.y + other)
+
+    def __sub__(self, other) -> 'Vec':
+        if type(other) is Vec:
+            return Vec(self.x - other.x, self.y - other.y)
+        return Vec(self.x - other, self.y - other)
+
+    def __mul__(self, other) -> 'Vec':
+        if type(other) is Vec:
+            return Vec(self.x * other.x, self.y * other.y)
+        return Vec(self.x * other, self.y * other)
+
+    def __truediv__(self, other) -> 'Vec':
+        if type(other) is Vec:
+            return Vec(self.x / other.x, self.y / other.y)
+        return Vec(self.x / other, self.y / other)
+
+    def __eq__(self, other) -> bool:
+        return type(other) is Vec and self.x == other.x and self.y == other.y
+
+    def __ne__(self, other) -> bool:
+        return not self.__eq__(other)
+
+    def __getstate__(self) -> tuple:
+        return (self.x, self.y)
+
+    def __setstate__(self, state: tuple) -> None:
+        self.x, self.y = state
+
+    def __repr__(self) -> str:
+        return "Vec(x={:f}; y={:f})".format(self.x, self.y)
+
+
+# image size from the PNG header, no pixel is decoded
+def read_png_size(path: str) -> tuple[int, int] | None:
+    try:
+        with open(path, 'rb') as file:
+            header = file.read(24)
+    except OSError:
+        return None
+
+    if len(header) < 24 or header[:8] != b'\x89PNG\r\n\x1a\n':
+        return None
+    return struct.unpack('>II', header[16:24])
+
+
+# pure python window: same callbacks and queries as the native one, nothing is rendered
+class Win:
+    RENDER_SIZE = (1280, 960)
+    IMAGE_SIZE = 16  # images that are not PNG files
+    FRAME_DT = 1 / 60
+
+    def __init__(self) -> None:
+        self.camera_pos = Vec()
+        self.camera_offset = Vec()
+        self.camera_zoom = 1.0
+
+        self.render_size = Vec(*Win.RENDER_SIZE)
+        self.running = True
+        self.ready = False
+
+        self.images: list[Vec] = []
+        self.fonts: list[str] = []
+
+        # scripted input, see set_keys
+        self.keys_down: set[int] = set()
+        self.keys_pressed: set[int] = set()
+        self.keys_released: set[int] = set()
+        self.mouse_position = Vec()
+        self.mouse_down = False
+        self.mouse_pressed = False
+        self.mouse_released = False
+        self.mouse_wheel = 0.0
+
+        self.frames = 0
+
+    # like the native window: objects copied by ObjectBase.copy keep a reference to it
+    def __reduce_ex__(self, protocol):
+        raise TypeError("cannot pickle 'Win' object")
+
+    # input of the next frame: the keys held down, pressed/released are derived from the last frame
+    def set_keys(self, keys):
+        keys = set(keys)
+        self.keys_pressed = keys - self.keys_down
+        self.keys_released = self.keys_down - keys
+        self.keys_down = keys
+
+    def set_mouse(self, position: Vec, down: bool = False, wheel: float = 0.0):
+        self.mouse_pressed = down and not self.mouse_down
+        self.mouse_released = self.mouse_down and not down
+        self.mouse_position = position
+        self.mouse_down = down
+        self.mouse_wheel = wheel
+
+    # one frame of the native loop
+    def frame(self, dt: float):
+        self.on_draw_background(dt)
+        self.on_draw(dt)
+        self.on_draw_ui(dt)
+        self.frames += 1
+
+    # runs until stop(), frames are not paced
+    def start(self, width: int = 0, height: int = 0, title: str = "", fullscreen: bool = False) -> None:
+        if width > 0 and height > 0:
+            self.render_size = Vec(width, height)
+
+        self.on_load()
+        self.on_ready()
+        self.ready = True
+
+        while self.running:
+            self.frame(Win.FRAME_DT)
+
+        self.on_close()
+
+    def stop(self) -> None:
+        self.running = False
+
+    def is_running(self) -> bool:
+        return self.running
+
+    def is_ready(self) -> bool:
+        return self.ready
+
+    def is_loading(self) -> bool:
+        return False
+
+    def on_close(self) -> None: ...
+    def on_draw(self, dt: float) -> None: ...
+    def on_draw_background(self, dt: float) -> None: ...
+    def on_draw_loading(self, dt: float) -> None: ...
+    def on_draw_ui(self, dt: float) -> None: ...
+    def on_load(self) -> None: ...
+    def on_ready(self) -> None: ...
+
+    def get_render_size(self) -> Vec:
+        return Vec(self.render_size.x, self.render_size.y)
+
+    def get_monitor_name(self) -> str:
+        return "headless"
+
+    def get_monitor_refresh_rate(self) -> float:
+        return 1 / Win.FRAME_DT
+
+    def get_monitor_size(self) -> Vec:
+        return self.get_render_size()
+
+    # snaps to the rect center (no smoothing)
+    def camera_follow_rect(self, position: Vec, size: Vec, min_distance: float, speed: float, min_speed: float) -> None:
+        self.camera_offset = self.render_size / 2
+        self.camera_pos = position + size / 2
+
+    def load_image(self, path: str) -> int:
+        size = read_png_size(path)
+        self.images.append(Vec(*size) if size is not None else Vec(Win.IMAGE_SIZE))
+        return len(self.images)
+
+    def get_image_size(self, image: int) -> Vec:
+        size = self.images[image - 1] if 0 < image <= len(self.images) else Vec(Win.IMAGE_SIZE)
+        return Vec(size.x, size.y)
+
+    # no pixel data without the GPU texture
+    def get_image_pixels(self, image: int) -> list[Color]:
+        return []
+
+    def load_font(self, path: str) -> int:
+        self.fonts.append(path)
+        return len(self.fonts)
+
+    def set_font(self, font: int) -> None: ...
+
+    # monospace estimate
+    def text_size(self, text: str, size: float) -> Vec:
+        lines = text.split("\n")
+        return Vec(max(len(line) for line in lines) * size / 2, len(lines) * size)
+
+    def get_points_clusters(self, points: list[Vec], distance: float) -> list[tuple[Vec, Vec]]:
+        return []
+
+    def is_key_down(self, key: int) -> bool:
+        return key in self.keys_down
+
+    def is_key_up(self, key: int) -> bool:
+        return key not in self.keys_down
+
+    def is_key_pressed(self, key: int) -> bool:
+        return key in self.keys_pressed
+
+    def is_key_release(self, key: int) -> bool:
+        return key in self.keys_released
+
+    def get_key_code(self) -> int:
+        return min(self.keys_pressed) if len(self.keys_pressed) != 0 else 0
+
+    def is_mouse_down(self) -> bool:
+        return self.mouse_down
+
+    def is_mouse_up(self) -> bool:
+        return not self.mouse_down
+
+    def is_mouse_pressed(self) -> bool:
+        return self.mouse_pressed
+
+    def is_mouse_release(self) -> bool:
+        return self.mouse_released
+
+    @property
+    def mouse(self) -> Vec:
+        return Vec(self.mouse_position.x, self.mouse_position.y)
+
+    @property
+    def wheel(self) -> float:
+        return self.mouse_wheel
+
+    # same edge rules as raylib
+    def col_rect_rect(self, position: Vec, size: Vec, other_position: Vec, other_size: Vec) -> bool:
+        return position.x < other_position.x + other_size.x and position.x + size.x > other_position.x and \
+            position.y < other_position.y + other_size.y and position.y + size.y > other_position.y
+
+    def col_rect_point(self, position: Vec, size: Vec, point: Vec) -> bool:
+        return position.x <= point.x < position.x + size.x and position.y <= point.y < position.y + size.y
+
+    def col_circle_circle(self, center: Vec, radius: float, other_center: Vec, other_radius: float) -> bool:
+        return math.hypot(center.x - other_center.x, center.y - other_center.y) <= radius + other_radius
+
+    def col_circle_point(self, center: Vec, radius: float, point: Vec) -> bool:
+        return math.hypot(center.x - point.x, center.y - point.y) <= radius
+
+    def col_rect_circle(self, position: Vec, size: Vec, center: Vec, radius: float) -> bool:
+        x = min(max(center.x, position.x), position.x + size.x)
+        y = min(max(center.y, position.y), position.y + size.y)
+        return math.hypot(center.x - x, center.y - y) <= radius
+
+    def draw_circle(self, center: Vec, radius: float, color: Color) -> None: ...
+    def draw_circleline(self, center: Vec, radius: float, color: Color) -> None: ...
+    def draw_image(self, image_id: int, position: Vec, size: Vec = None, rotation: float = 0, origin: Vec = None) -> None: ...
+    def draw_image_scale(self, image_id: int, position: Vec, scale: float, rotation: float) -> None: ...
+    def draw_line(self, start: Vec, end: Vec, color: Color) -> None: ...
+    def draw_line_bezier(self, start: Vec, end: Vec, start_control: Vec, end_control: Vec, color: Color) -> None: ...
+    def draw_rect(self, position: Vec, size: Vec, color: Color) -> None: ...
+    def draw_rectgradient(self, position: Vec, size: Vec, top_left: Color, bottom_left: Color, bottom_right: Color, top_right: Color) -> None: ...
+    def draw_rectline(self, position: Vec, size: Vec, color: Color) -> None: ...
+    def draw_rectrot(self, position: Vec, size: Vec, rotation: float, color: Color) -> None: ...
+    def draw_rectround(self, position: Vec, size: Vec, roundness: float, color: Color) -> None: ...
+    def draw_text(self, text: str, position: Vec, size: float, color: Color) -> None: ...
+
+
+# registers the stand-in as BTP.BTP, before anything imports the native module
+def install() -> types.ModuleType:
+    module = sys.modules.get("BTP.BTP")
+    if module is not None and getattr(module, "HEADLESS", False):
+        return module
+
+    module = types.ModuleType("BTP.BTP", "BTP headless stand-in (no window, no rendering)")
+    module.__version__ = "headless"
+    module.__libvers__ = "none"
+    module.HEADLESS = True
+    module.__all__ = ["Color", "Vec", "Win"]
+    for classbase in (Color, Vec, Win):
+        # pickled maps reference BTP.BTP, with or without the native module
+        classbase.__module__ = "BTP.BTP"
+        setattr(module, classbase.__name__, classbase)
+
+    sys.modules["BTP.BTP"] = module
+
+    import BTP
+    BTP.BTP = module
+    return module
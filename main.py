@@ -4,9 +4,9 @@ import BTP.BTP
 import os
 import sys
 
-from core import ComponentObject, TextureAtlas, ObjectBaseAtlas
+from core import ComponentObject, ANIMATION_CLOCK, PROFILER, DrawRecorder, InputSession, InputRecorder, InputReplayer, InputFileError, TextureAtlas, ObjectBaseAtlas, AssetLoader, LoadingProgress
 from components import *
-from utility import DungeonScreens, DungeonActionTypes, TILE_SIZE
+from utility import DungeonScreens, DungeonActionTypes, TILE_SIZE, WHITE, Stats
 from screens import Menu, Game, MapCreator, Loading
 
 
@@ -19,6 +19,7 @@ class Dungeon(Win):
 
         self.texture_atlas = TextureAtlas()
         self.objects_atlas = ObjectBaseAtlas()
+        self.loading_progress = LoadingProgress()
         self.object_base: list[ComponentObject] = [
             Character,
             Doors,
@@ -32,7 +33,7 @@ class Dungeon(Win):
             Hearts
         ]
 
-        self.loading = Loading(self, self.objects_atlas)
+        self.loading = Loading(self, self.objects_atlas, self.loading_progress)
         self.menu = Menu(self, self.objects_atlas)
         self.game = Game(self, self.objects_atlas)
         self.map_creator = MapCreator(self, self.objects_atlas)
@@ -40,6 +41,14 @@ class Dungeon(Win):
         self.state = DungeonScreens.MENU
         self.no_assets = False
 
+        self.draw_recorder = DrawRecorder(self)
+        self.draw_stats = Stats(self)
+
+        # --record/--replay: input, dt and random seeds of every frame
+        self.input_session: InputSession | None = None
+        self.frame_dt = 0.0
+        self.frame_locked = False
+
     def on_ready(self) -> None:
         if self.no_assets:
             return
@@ -58,23 +67,68 @@ class Dungeon(Win):
         self.map_creator.on_ready()
         self.game.on_ready()
 
+        self.draw_recorder.textures = self.texture_atlas.get_keys()
+        if self.draw_recorder.enabled:
+            self.draw_recorder.attach()
+
     def on_close(self) -> None:
-        pass
+        self.map_creator.stop_update_thread()
+        self.game.close_game()
+
+        if self.input_session is not None:
+            self.input_session.close()
+        if PROFILER.enabled:
+            PROFILER.save_trace()
 
     def on_draw_background(self, dt: float) -> None:
         pass
 
     def on_draw(self, dt: float) -> None:
-        match self.state:
-            case DungeonScreens.MAP_CREATOR:
-                self.map_creator.on_draw(dt)
-            case DungeonScreens.GAME:
-                self.game.on_draw(dt)
+        if self.input_session is not None:
+            dt = self.input_session.next_frame(dt)
+        self.frame_dt = dt
+
+        ANIMATION_CLOCK.tick(dt)
+        PROFILER.add_frame(dt)
+        self.draw_recorder.next_frame()
+
+        with PROFILER.scope("Dungeon.on_draw"):
+            match self.state:
+                case DungeonScreens.MAP_CREATOR:
+                    self.map_creator.on_draw(dt)
+                case DungeonScreens.GAME:
+                    self.game.on_draw(dt)
 
     def on_draw_ui(self, dt: float) -> None:
         if self.is_loading():
             return
 
+        dt = self.frame_dt
+        self.draw_recorder.set_phase(DrawRecorder.UI)
+        with PROFILER.scope("Dungeon.on_draw_ui"):
+            self.draw_screen_ui(dt)
+        if self.frame_locked:
+            self.step_screen(dt)
+
+        if self.draw_recorder.attached:
+            for key, val in self.draw_recorder.get_lines().items():
+                self.draw_stats[key] = val
+            self.draw_stats.on_draw(Vec(10, self.get_render_size().y - 100), 20, WHITE)
+
+    # no background view/entities threads: their work runs once per frame, after the ui, with the frame dt
+    def set_frame_locked(self, frame_locked: bool = True):
+        self.frame_locked = frame_locked
+        self.game.map.frame_locked = frame_locked
+        self.map_creator.frame_locked = frame_locked
+
+    def step_screen(self, dt: float) -> None:
+        match self.state:
+            case DungeonScreens.MAP_CREATOR:
+                self.map_creator.step(dt)
+            case DungeonScreens.GAME:
+                self.game.map.step(dt)
+
+    def draw_screen_ui(self, dt: float) -> None:
         if self.no_assets:
             self.loading.on_draw_error("Assets not found")
             return
@@ -113,18 +167,10 @@ class Dungeon(Win):
                 self.no_assets = True
                 return
 
-            files = os.listdir(Dungeon.ASSETS_DIR)
-            for filename in files:
-                texture_path = os.path.abspath(Dungeon.ASSETS_DIR + filename)
-                texture_id = self.load_image(texture_path)
-
-                self.texture_atlas.add(filename, texture_id)
-
             for type in self.object_base:
                 self.objects_atlas.register(type)
 
-            for texture in self.texture_atlas.textures:
-                self.objects_atlas.add(texture)
+            AssetLoader(Dungeon.ASSETS_DIR, self.objects_atlas, self.loading_progress).load(self.load_image, self.texture_atlas)
 
             self.menu.on_load()
         except Exception as e:
@@ -133,14 +179,42 @@ class Dungeon(Win):
         # time.sleep(3)
 
 
+# value following the flag, the default file name without it
+def get_arg(args, name: str) -> str:
+    index = args.index(name) + 1
+    return args[index] if index < len(args) and not args[index].startswith("--") else "session" + InputSession.EXTENSION
+
+
 def main(args):
     size = (0,0)
     fullscreen = True
     if "--debug" in args:
         size = (1280,960)
         fullscreen = False
+    if "--profile" in args:
+        PROFILER.enable()
+
+    dungeon = Dungeon()
+    if "--drawcalls" in args:
+        dungeon.draw_recorder.enabled = True
+
+    # started before the window: the random calls of on_ready are seeded too
+    if "--record" in args:
+        dungeon.input_session = InputRecorder(dungeon, get_arg(args, "--record"))
+    elif "--replay" in args:
+        dungeon.input_session = InputReplayer(dungeon, get_arg(args, "--replay"))
+    if dungeon.input_session is not None:
+        try:
+            dungeon.input_session.start()
+        except (OSError, InputFileError) as e:
+            print(e)
+            dungeon.input_session = None
+
+    # the recording and its replays run the same frames
+    if dungeon.input_session is not None:
+        dungeon.set_frame_locked()
 
-    Dungeon().start(*size, "Dungeon - BTP v{} | {}".format(BTP.BTP.__version__,BTP.BTP.__libvers__), fullscreen)
+    dungeon.start(*size, "Dungeon - BTP v{} | {}".format(BTP.BTP.__version__,BTP.BTP.__libvers__), fullscreen)
     return 0
 
 
@@ -1,3 +1,12 @@
 from map.map import MapBase, MapData
-from map.chunk import Chunk, ChunkData
-from map.tile import TileData
\ No newline at end of file
+from map.chunk import Chunk, ChunkData, StackPolicy
+from map.index import ChunkIndex
+from map.collision import CollisionGrid
+from map.view import FrameView
+from map.tile import TileData, CollisionRect
+from map.binary import MapFile, MapFileError
+from map.pager import ChunkPager
+from map.autosave import MapAutosave
+from map.bulk import ChunkBuilder
+from map.catalog import MapCatalog, MapInfo, MapSort
+from map.minimap import Minimap
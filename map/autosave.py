@@ -0,0 +1,161 @@
+import os
+import struct
+import threading
+
+from map.chunk import Chunk, ChunkData
+from map.binary import MapFile, MapFileError
+
+
+class MapAutosave:
+    INTERVAL = 5.0  # seconds between two flushes of the edited chunks
+    EXTENSION = ".journal"
+
+    # the journal is append only: each flush adds a segment, a map file of the chunks edited since the previous one
+    SEGMENT = struct.Struct('<4sQ')  # magic, map file bytes
+    SEGMENT_MAGIC = b"PDJS"
+
+    # map_base: MapBase being edited
+    def __init__(self, map_base) -> None:
+        self.map_base = map_base
+
+        self.lock = threading.Lock()
+        self.dirty: set[tuple[int, int]] = set()
+
+        self.wake = threading.Event()
+        self.running = False
+        self.generation = 0
+
+        self.flushes = 0
+
+    @staticmethod
+    def get_path(name: str) -> str:
+        return name + MapAutosave.EXTENSION
+
+    # chunks saved after the map file, replacing its chunks under the same key (later segments win)
+    @staticmethod
+    def read(name: str, types: dict[str, type]) -> dict[tuple[int, int], ChunkData]:
+        path = MapAutosave.get_path(name)
+        if not os.path.exists(path):
+            return {}
+
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except OSError as e:
+            print(e)
+            return {}
+
+        chunks = {}
+        offset = 0
+        while offset < len(data):
+            # a segment cut by a crash ends the journal
+            if offset + MapAutosave.SEGMENT.size > len(data):
+                print("{}: truncated segment".format(path))
+                break
+            magic, size = MapAutosave.SEGMENT.unpack_from(data, offset)
+            offset += MapAutosave.SEGMENT.size
+            if magic != MapAutosave.SEGMENT_MAGIC or offset + size > len(data):
+                print("{}: truncated segment".format(path))
+                break
+
+            try:
+                with MapFile.from_buffer(path, data[offset:offset + size], types) as segment:
+                    chunks.update((key, segment.read_chunk(key)) for key in segment.keys())
+            except MapFileError as e:
+                print(e)
+                break
+            offset += size
+        return chunks
+
+    def start(self):
+        if self.running:
+            return
+
+        self.running = True
+        self.generation += 1
+        self.wake.clear()
+        threading.Thread(target=self.run, args=(self.generation,), daemon=True).start()
+
+    def stop(self):
+        self.running = False
+        self.generation += 1
+        self.wake.set()
+        self.flush()
+
+    def run(self, generation: int):
+        while self.generation == generation and self.map_base.btp.is_running():
+            self.wake.wait(MapAutosave.INTERVAL)
+            if self.generation != generation:
+                break
+            self.flush()
+
+        if self.generation == generation:
+            self.running = False
+
+    def mark(self, key: tuple[int, int]):
+        with self.lock:
+            self.dirty.add(key)
+
+    def get_data(self, key: tuple[int, int]) -> ChunkData:
+        chunk = self.map_base.map.get(key)
+        if chunk is not None:
+            return chunk.to_data()
+
+        pager = self.map_base.pager
+        if pager is not None and pager.edits.get(key) is not None:
+            return pager.edits[key]
+
+        data = ChunkData()
+        data.position = Chunk.from_key(key)
+        return data
+
+    # append the chunks edited since the last flush, the map file itself is left untouched
+    def flush(self) -> bool:
+        with self.lock:
+            if len(self.dirty) == 0:
+                return False
+
+            keys, self.dirty = self.dirty, set()
+            segment = b"".join(MapFile.pack_chunks([self.get_data(key) for key in keys]))
+
+            # never saved maps only have their journal until they are exported
+            try:
+                with open(MapAutosave.get_path(self.map_base.get_map_name()), 'ab') as file:
+                    start = file.tell()
+                    try:
+                        file.write(MapAutosave.SEGMENT.pack(MapAutosave.SEGMENT_MAGIC, len(segment)))
+                        file.write(segment)
+                        file.flush()
+                        os.fsync(file.fileno())
+                    except OSError:
+                        # the next segments must follow a complete one
+                        file.truncate(start)
+                        raise
+            except OSError as e:
+                print(e)
+                self.dirty |= keys
+                return False
+
+            self.flushes += 1
+            return True
+
+    def clear(self):
+        self.dirty.clear()
+
+    def remove_journal(self):
+        path = MapAutosave.get_path(self.map_base.map_name) if self.map_base.map_name is not None else None
+        if path is not None and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(e)
+
+    # the full map was saved, the journal is merged into it
+    def reset(self):
+        self.clear()
+        self.remove_journal()
+
+    # left without saving: the edits since the last full save are dropped with their journal
+    def discard(self):
+        with self.lock:
+            self.reset()
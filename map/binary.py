@@ -0,0 +1,280 @@
+import mmap
+import os
+import pickle
+import struct
+from typing import Iterable
+
+from BTP.BTP import *
+from core import ObjectBase, ObjectBaseAtlas
+from utility import DungeonActionData
+
+from map.chunk import Chunk, ChunkData
+from map.tile import TileData
+from components.character import CharacterData
+
+
+class MapFileError(Exception):
+    pass
+
+
+# little endian layout:
+#   header | string table | entities (player first) | chunk index | tile records
+class MapFile:
+    EXTENSION = ".map"
+    LEGACY_EXTENSION = ".dat"
+
+    MAGIC = b"PDMP"
+    VERSION = 1
+    HAS_PLAYER = 1
+
+    # magic, version, flags, chunk size, strings, entities, chunks, strings offset, entities offset, index offset
+    HEADER = struct.Struct('<4sHHIIIIQQQ')
+    STRING = struct.Struct('<H')
+    # name, plugin, role (string indexes), x, y
+    ENTITY = struct.Struct('<IIIff')
+    # chunk x, chunk y, records offset, records count
+    INDEX = struct.Struct('<iiQI')
+    # class, name (string indexes), x, y, flip x, flip y, layer, collision
+    TILE = struct.Struct('<IIffbbBB')
+
+    def __init__(self, path: str, types: dict[str, type]) -> None:
+        self.path = path
+        self.types = types
+
+        self.file = open(path, 'rb')
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.read_header()
+        except MapFileError:
+            self.close()
+            raise
+        except (ValueError, struct.error) as e:
+            self.close()
+            raise MapFileError("{}: {}".format(path, e))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self.file is None:
+            self.data = None
+            return
+
+        if getattr(self, 'data', None) is not None:
+            self.data.close()
+            self.data = None
+        self.file.close()
+
+    # map file held in memory (journal segments), path is only used in errors
+    @classmethod
+    def from_buffer(cls, path: str, data: bytes, types: dict[str, type]) -> 'MapFile':
+        map_file = cls.__new__(cls)
+        map_file.path = path
+        map_file.types = types
+        map_file.file = None
+        map_file.data = data
+        try:
+            map_file.read_header()
+        except (ValueError, struct.error) as e:
+            raise MapFileError("{}: {}".format(path, e))
+        return map_file
+
+    # class name -> class, for every class a map tile can be spawned with
+    @staticmethod
+    def get_types(atlas: ObjectBaseAtlas) -> dict[str, type]:
+        return {classbase.__name__: classbase for classbase in [ObjectBase] + atlas.types}
+
+    @staticmethod
+    def get_path(name: str) -> str | None:
+        for extension in (MapFile.EXTENSION, MapFile.LEGACY_EXTENSION):
+            if os.path.exists(name + extension):
+                return name + extension
+        return None
+
+    def read_header(self):
+        magic, version, self.flags, chunk_size, strings_count, self.entities_count, chunks_count, \
+            strings_offset, self.entities_offset, index_offset = MapFile.HEADER.unpack_from(self.data, 0)
+
+        if magic != MapFile.MAGIC:
+            raise MapFileError("{}: not a map file".format(self.path))
+        if version != MapFile.VERSION:
+            raise MapFileError("{}: unsupported version {}".format(self.path, version))
+        if chunk_size != Chunk.DEFAULT_SIZE:
+            raise MapFileError("{}: chunk size {} (expected {})".format(self.path, chunk_size, Chunk.DEFAULT_SIZE))
+
+        self.strings: list[str] = []
+        offset = strings_offset
+        for i in range(strings_count):
+            (length,) = MapFile.STRING.unpack_from(self.data, offset)
+            offset += MapFile.STRING.size
+            self.strings.append(self.data[offset:offset + length].decode('utf-8'))
+            offset += length
+
+        self.index: dict[tuple[int, int], tuple[int, int]] = {}
+        for cx, cy, records_offset, count in MapFile.INDEX.iter_unpack(self.data[index_offset:index_offset + chunks_count * MapFile.INDEX.size]):
+            self.index[(cx, cy)] = (records_offset, count)
+
+    # reads after close() raise ValueError, as they do on a closed file
+    def get_data(self):
+        data = self.data
+        if data is None:
+            raise ValueError("{}: map file closed".format(self.path))
+        return data
+
+    def keys(self) -> list[tuple[int, int]]:
+        return list(self.index.keys())
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, key: tuple[int, int]) -> bool:
+        return key in self.index
+
+    # raw (class index, name index, x, y, flip x, flip y, layer, collision) records of a chunk
+    def read_records(self, key: tuple[int, int]) -> list[tuple] | None:
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+
+        offset, count = entry
+        return list(MapFile.TILE.iter_unpack(self.get_data()[offset:offset + count * MapFile.TILE.size]))
+
+    # only the records of this chunk are read from the mapping
+    def read_chunk(self, key: tuple[int, int]) -> ChunkData | None:
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+
+        offset, count = entry
+        data = ChunkData()
+        data.position = Chunk.from_key(key)
+
+        strings = self.strings
+        for classindex, nameindex, x, y, flip_x, flip_y, layer, collision in MapFile.TILE.iter_unpack(self.get_data()[offset:offset + count * MapFile.TILE.size]):
+            tile = TileData()
+            tile.object = self.types.get(strings[classindex], ObjectBase)
+            tile.name = strings[nameindex]
+            tile.position = Vec(x, y)
+            tile.flip = Vec(flip_x, flip_y)
+            tile.layer = layer
+            tile.collision = collision != 0
+            data.tiles.append(tile)
+        return data
+
+    def read_chunks(self) -> list[ChunkData]:
+        return [self.read_chunk(key) for key in self.index]
+
+    # (player, entities)
+    def read_entities(self) -> tuple[CharacterData | None, list[CharacterData]]:
+        entities = []
+        offset = self.entities_offset
+        for name, plugin, role, x, y in MapFile.ENTITY.iter_unpack(self.get_data()[offset:offset + self.entities_count * MapFile.ENTITY.size]):
+            entity = CharacterData()
+            entity.name = self.strings[name]
+            entity.plugin_name = self.strings[plugin]
+            entity.position = Vec(x, y)
+            entity.action_data = DungeonActionData(role=self.strings[role])
+            entities.append(entity)
+
+        if self.flags & MapFile.HAS_PLAYER and len(entities) > 0:
+            return entities[0], entities[1:]
+        return None, entities
+
+    # map_data: MapData
+    @staticmethod
+    def write(path: str, map_data):
+        MapFile.write_chunks(path, map_data.chunks, getattr(map_data, 'player', None), map_data.entities)
+
+    # written next to the destination, synced, then renamed over it
+    @staticmethod
+    def write_chunks(path: str, chunks_data: Iterable[ChunkData], player: CharacterData | None = None, entities: list[CharacterData] = ()):
+        temp = path + ".tmp"
+        with open(temp, 'wb') as file:
+            for part in MapFile.pack_chunks(chunks_data, player, entities):
+                file.write(part)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp, path)
+
+    # the parts of a map file, in order; a chunk without tiles is kept in the index
+    @staticmethod
+    def pack_chunks(chunks_data: Iterable[ChunkData], player: CharacterData | None = None, entities: list[CharacterData] = ()) -> tuple[bytes, ...]:
+        strings: dict[str, int] = {}
+
+        def get_string(value: str) -> int:
+            index = strings.get(value)
+            if index is None:
+                index = strings[value] = len(strings)
+            return index
+
+        entities = ([player] if player is not None else []) + list(entities)
+        entities_data = bytearray()
+        for entity in entities:
+            role = entity.action_data.role if getattr(entity, 'action_data', None) is not None else DungeonActionData().role
+            entities_data += MapFile.ENTITY.pack(get_string(entity.name), get_string(entity.plugin_name), get_string(role),
+                                                 entity.position.x, entity.position.y)
+
+        # packed as they come (chunks_data can be a generator), chunks saved more than once (older maps) are merged under their key
+        chunks: dict[tuple[int, int], list] = {}
+        for chunk in chunks_data:
+            records = chunks.setdefault(Chunk.get_key(chunk.position), [bytearray(), 0])
+            for tile in chunk.tiles:
+                records[0] += MapFile.TILE.pack(get_string(tile.object.__name__), get_string(tile.name), tile.position.x, tile.position.y,
+                                                int(tile.flip.x), int(tile.flip.y), getattr(tile, 'layer', 0), 1 if tile.collision else 0)
+            records[1] += len(chunk.tiles)
+
+        records_data = bytearray()
+        index = []
+        for key, (records, count) in chunks.items():
+            index.append((key, len(records_data), count))
+            records_data += records
+        chunks.clear()
+
+        strings_data = bytearray()
+        for value in strings:
+            encoded = value.encode('utf-8')
+            strings_data += MapFile.STRING.pack(len(encoded)) + encoded
+
+        strings_offset = MapFile.HEADER.size
+        entities_offset = strings_offset + len(strings_data)
+        index_offset = entities_offset + len(entities_data)
+        records_offset = index_offset + len(index) * MapFile.INDEX.size
+
+        index_data = bytearray()
+        for key, offset, count in index:
+            index_data += MapFile.INDEX.pack(key[0], key[1], records_offset + offset, count)
+
+        header = MapFile.HEADER.pack(MapFile.MAGIC, MapFile.VERSION, MapFile.HAS_PLAYER if player is not None else 0, Chunk.DEFAULT_SIZE,
+                                     len(strings), len(entities), len(index), strings_offset, entities_offset, index_offset)
+
+        return (header, strings_data, entities_data, index_data, records_data)
+
+    # <name>.dat (pickled MapData) -> <name>.map
+    @staticmethod
+    def convert(name: str) -> str:
+        with open(name + MapFile.LEGACY_EXTENSION, 'rb') as file:
+            map_data = pickle.load(file)
+
+        if not hasattr(map_data, 'chunks'):
+            raise MapFileError("{}: no map data".format(name + MapFile.LEGACY_EXTENSION))
+
+        path = name + MapFile.EXTENSION
+        MapFile.write(path, map_data)
+        return path
+
+
+def main(args):
+    for name in args:
+        try:
+            print(MapFile.convert(name.removesuffix(MapFile.LEGACY_EXTENSION)))
+        except (OSError, pickle.UnpicklingError, MapFileError) as e:
+            print(e)
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,124 @@
+import gc
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+
+from BTP.BTP import *
+from core import ObjectBase
+from utility import TILE_SIZE
+
+from map.chunk import Chunk, ChunkData
+from map.binary import MapFile
+
+
+class ChunkBuilder:
+
+    # map_base: MapBase the chunks are built for
+    def __init__(self, map_base) -> None:
+        self.map_base = map_base
+
+        # atlas object of each (class, name), resolved once
+        self.objects: dict[tuple[type, str], ObjectBase | None] = {}
+        # (atlas object, flip) of the string indexes of the current map file
+        self.source: MapFile | None = None
+        self.records: dict[tuple[int, int], tuple] = {}
+        # flip vectors shared by the tiles (like the prototype flip)
+        self.flips: dict[tuple[int, int], Vec] = {}
+
+    def clear(self):
+        self.objects.clear()
+        self.records.clear()
+        self.source = None
+
+    def set_source(self, source: MapFile):
+        if source is not self.source:
+            self.source = source
+            self.records = {}
+
+    def get_object(self, classbase, name: str) -> ObjectBase | None:
+        key = (classbase, name)
+        if key not in self.objects:
+            self.objects[key] = self.map_base.atlas.find(classbase, name)
+        return self.objects[key]
+
+    def get_flip(self, x: int, y: int) -> Vec:
+        flip = self.flips.get((x, y))
+        if flip is None:
+            flip = self.flips[(x, y)] = Vec(x, y)
+        return flip
+
+    def spawn(self, obj: ObjectBase, position: Vec, flip: Vec | None, collision: bool):
+        if obj.prototype is None:
+            return self.map_base.atlas.spawn(type(obj), obj.name, position, flip if flip is not None else Vec(obj.flip.x, obj.flip.y), collision)
+        return obj.prototype.spawn(position, flip, collision)
+
+    def new_chunk(self, position: Vec) -> Chunk:
+        return self.map_base.setup_chunk(Chunk(self.map_base.btp, self.map_base.atlas, position))
+
+    def from_data(self, data: ChunkData) -> Chunk:
+        tiles = []
+        for tile in sorted(data.tiles, key=lambda tile: getattr(tile, 'layer', 0)):
+            obj = self.get_object(tile.object, tile.name)
+            if obj is not None:
+                tiles.append(self.spawn(obj, tile.position, tile.flip, tile.collision))
+
+        chunk = self.new_chunk(data.position)
+        chunk.place_tiles(tiles)
+        return chunk
+
+    # (atlas object, its flip) of a record class and name
+    def get_record_object(self, source: MapFile, classindex: int, nameindex: int) -> tuple[ObjectBase | None, tuple]:
+        obj = self.get_object(source.types.get(source.strings[classindex], ObjectBase), source.strings[nameindex])
+        if obj is None:
+            return (None, ())
+        return (obj, (int(obj.flip.x), int(obj.flip.y)))
+
+    # straight from the file records: no TileData objects, cells computed from the record position
+    def from_file(self, source: MapFile, key: tuple[int, int]) -> Chunk | None:
+        records = source.read_records(key)
+        if records is None:
+            return None
+
+        self.set_source(source)
+        objects = self.records
+
+        chunk = self.new_chunk(Chunk.from_key(key))
+        origin_x, origin_y = chunk.position.x, chunk.position.y
+        last = Chunk.DEFAULT_SIZE - 1
+
+        tiles = []
+        for classindex, nameindex, x, y, flip_x, flip_y, layer, collision in sorted(records, key=itemgetter(6)):
+            entry = objects.get((classindex, nameindex))
+            if entry is None:
+                entry = objects[(classindex, nameindex)] = self.get_record_object(source, classindex, nameindex)
+
+            obj, flip = entry
+            if obj is None:
+                continue
+
+            cell_x = min(max(int((x - origin_x) // TILE_SIZE), 0), last)
+            cell_y = min(max(int((y - origin_y) // TILE_SIZE), 0), last)
+            # unflipped tiles share the prototype flip
+            flip = None if flip == (flip_x, flip_y) else self.get_flip(flip_x, flip_y)
+            tiles.append((cell_y * Chunk.DEFAULT_SIZE + cell_x, self.spawn(obj, Vec(x, y), flip, collision != 0)))
+
+        chunk.place_cells(tiles)
+        return chunk
+
+    # workers: decode pool size, 0 builds on the calling thread
+    def load(self, source: MapFile, keys: list[tuple[int, int]], workers: int = 0) -> list[Chunk]:
+        self.set_source(source)
+
+        # allocations only: collections would keep rescanning the growing tile graph
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            if workers <= 0:
+                chunks = [self.from_file(source, key) for key in keys]
+            else:
+                with ThreadPoolExecutor(workers) as pool:
+                    chunks = list(pool.map(lambda key: self.from_file(source, key), keys))
+        finally:
+            if enabled:
+                gc.enable()
+
+        return [chunk for chunk in chunks if chunk is not None]
@@ -0,0 +1,143 @@
+import json
+import os
+import pickle
+import threading
+from dataclasses import dataclass, asdict
+
+from map.chunk import Chunk
+from map.binary import MapFile, MapFileError
+from map.autosave import MapAutosave
+
+
+@dataclass
+class MapInfo:
+    name: str
+    path: str
+    chunks: int = 0
+    tiles: int = 0
+    bounds: tuple = (0, 0, 0, 0)  # chunk keys: min x, min y, max x, max y
+    entities: int = 0
+    modified: int = 0  # st_mtime_ns
+    size: int = 0
+
+
+class MapSort:
+    NAME = "name"
+    MODIFIED = "modified"  # most recent first
+    TILES = "tiles"  # biggest first
+
+
+class MapCatalog:
+    VERSION = 1
+    INDEX = "maps.index.json"
+
+    def __init__(self, directory: str = ".") -> None:
+        self.directory = directory
+        self.path = os.path.join(directory, MapCatalog.INDEX)
+        self.lock = threading.Lock()
+
+        self.maps: dict[str, MapInfo] = {}
+        self.loaded = False
+
+    def load_index(self):
+        self.loaded = True
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, 'r') as file:
+                data = json.load(file)
+            if data.get('version') == MapCatalog.VERSION:
+                self.maps = {info['name']: MapInfo(**{**info, 'bounds': tuple(info['bounds'])}) for info in data['maps']}
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            print(e)
+            self.maps = {}
+
+    def save_index(self):
+        try:
+            temp = self.path + ".tmp"
+            with open(temp, 'w') as file:
+                json.dump({'version': MapCatalog.VERSION, 'maps': [asdict(info) for info in self.maps.values()]}, file)
+            os.replace(temp, self.path)
+        except OSError as e:
+            print(e)
+
+    # header and index of a .map, the whole pickle of a .dat, the segments of a never exported map's journal (once, until it changes)
+    @staticmethod
+    def read_info(info: MapInfo) -> MapInfo:
+        keys = []
+        if info.path.endswith(MapFile.EXTENSION):
+            with MapFile(info.path, {}) as map_file:
+                keys = map_file.keys()
+                info.tiles = sum(count for offset, count in map_file.index.values())
+                info.entities = map_file.entities_count
+        elif info.path.endswith(MapAutosave.EXTENSION):
+            chunks = [chunk for chunk in MapAutosave.read(os.path.splitext(info.path)[0], {}).values() if len(chunk.tiles) > 0]
+            keys = [Chunk.get_key(chunk.position) for chunk in chunks]
+            info.tiles = sum(len(chunk.tiles) for chunk in chunks)
+        else:
+            with open(info.path, 'rb') as file:
+                map_data = pickle.load(file)
+            keys = list({Chunk.get_key(chunk.position) for chunk in map_data.chunks})
+            info.tiles = sum(len(chunk.tiles) for chunk in map_data.chunks)
+            info.entities = len(map_data.entities) + (1 if hasattr(map_data, 'player') else 0)
+
+        info.chunks = len(keys)
+        if len(keys) > 0:
+            info.bounds = (min(key[0] for key in keys), min(key[1] for key in keys),
+                           max(key[0] for key in keys), max(key[1] for key in keys))
+        return info
+
+    # stat only, maps are read again when their mtime or size changed
+    def refresh(self) -> list[MapInfo]:
+        with self.lock:
+            if not self.loaded:
+                self.load_index()
+
+            maps = {}
+            changed = False
+            for entry in os.scandir(self.directory):
+                name, extension = os.path.splitext(entry.name)
+                if not entry.is_file() or extension not in (MapFile.EXTENSION, MapFile.LEGACY_EXTENSION, MapAutosave.EXTENSION):
+                    continue
+                # same name in both formats: the .map is the one loaded
+                if extension == MapFile.LEGACY_EXTENSION and os.path.exists(os.path.join(self.directory, name + MapFile.EXTENSION)):
+                    continue
+                # a journal is only listed for a map that was never exported (recovered after a crash)
+                if extension == MapAutosave.EXTENSION and MapFile.get_path(os.path.join(self.directory, name)) is not None:
+                    continue
+
+                stat = entry.stat()
+                info = self.maps.get(name)
+                if info is None or info.path != entry.path or info.modified != stat.st_mtime_ns or info.size != stat.st_size:
+                    try:
+                        info = MapCatalog.read_info(MapInfo(name, entry.path, modified=stat.st_mtime_ns, size=stat.st_size))
+                    except (OSError, EOFError, AttributeError, ImportError, pickle.UnpicklingError, MapFileError) as e:
+                        print(e)
+                        continue
+                    changed = True
+                maps[name] = info
+
+            changed = changed or maps.keys() != self.maps.keys()
+            self.maps = maps
+            if changed:
+                self.save_index()
+
+            return list(self.maps.values())
+
+    def get(self, name: str) -> MapInfo | None:
+        return self.maps.get(name)
+
+    def exists(self, name: str) -> bool:
+        return name in self.maps
+
+    def get_maps(self, sort: str = MapSort.MODIFIED) -> list[MapInfo]:
+        maps = list(self.maps.values())
+        match sort:
+            case MapSort.NAME:
+                maps.sort(key=lambda info: info.name)
+            case MapSort.MODIFIED:
+                maps.sort(key=lambda info: info.modified, reverse=True)
+            case MapSort.TILES:
+                maps.sort(key=lambda info: info.tiles, reverse=True)
+        return maps
@@ -1,8 +1,10 @@
 from BTP.BTP import *
 from core import *
 
-from map.tile import TileData
-from utility import TILE_SIZE, WHITE, from_vec_str, is_in_view
+import math
+
+from map.tile import TileData, CollisionRect
+from utility import TILE_SIZE, WHITE, is_in_view
 
 
 class ChunkData:
@@ -13,79 +15,244 @@ class ChunkData:
         self.tiles: list[TileData] = []
 
 
+class StackPolicy:
+    REPLACE = "replace"  # new tile replaces the top layer
+    STACK = "stack"  # new tile goes on top, up to max_layers
+    REJECT = "reject"  # occupied cells are left untouched
+
+
 class Chunk(Component):
     DEFAULT_SIZE = 6
+    MAX_LAYERS = 4
 
     def __init__(self, btp: Win, atlas: ObjectBaseAtlas, position: Vec) -> None:
         self.btp = btp
         self.atlas = atlas
 
-        self.tiles: list[ComponentObject] = []
-        self.tiles_view: list[ComponentObject] = []
+        # DEFAULT_SIZE² cells (row major), each cell holds its layers bottom to top
+        self.cells: list[list[ComponentObject]] = [[] for i in range(Chunk.DEFAULT_SIZE ** 2)]
+        self.collision_mask: int = 0
+        self.colliders: tuple | None = None  # cached by get_colliders, reset on change
+        self.stack_policy = StackPolicy.STACK
+        self.max_layers = Chunk.MAX_LAYERS
+
+        # rebuilt (never mutated) on change so update threads can read it while the creator edits
+        self.tiles: tuple[ComponentObject, ...] = ()
         self.tile_size = Vec(TILE_SIZE)
 
         self.position = position
         self.size = Vec(Chunk.DEFAULT_SIZE) * self.tile_size
+        self.key = Chunk.get_key(position)
 
         self.creator_info = False
 
+    @staticmethod
+    def get_key(position: Vec) -> tuple[int, int]:
+        chunk_size = Chunk.DEFAULT_SIZE * TILE_SIZE
+        return (math.floor(position.x / chunk_size), math.floor(position.y / chunk_size))
+
+    @staticmethod
+    def from_key(key: tuple[int, int]) -> Vec:
+        chunk_size = Chunk.DEFAULT_SIZE * TILE_SIZE
+        return Vec(key[0] * chunk_size, key[1] * chunk_size)
+
     @staticmethod
     def from_data(data: ChunkData, btp: Win, atlas: ObjectBaseAtlas) -> Self:
         chunk = Chunk(btp, atlas, data.position)
-        for tile in data.tiles:
-            obj_tile = atlas.copy(tile.object, tile.name)
+        # maps saved before layers existed have no layer, keep their order
+        tiles = []
+        for tile in sorted(data.tiles, key=lambda tile: getattr(tile, 'layer', 0)):
+            obj_tile = atlas.spawn(tile.object, tile.name, tile.position, tile.flip, tile.collision)
             if obj_tile is not None:
-                obj_tile.position = tile.position
-                obj_tile.flip = tile.flip
-                obj_tile.collision = tile.collision
-                chunk.tiles.append(obj_tile)
+                tiles.append(obj_tile)
+        chunk.place_tiles(tiles)
         return chunk
 
     def to_data(self) -> ChunkData:
         data = ChunkData()
         data.position = self.position
-        for tile in self.tiles:
-            data_tile = TileData()
-            data_tile.object = tile.__class__
-            data_tile.flip = tile.flip
-            data_tile.name = tile.name
-            data_tile.collision = tile.collision
-            data_tile.position = tile.position
-            data.tiles.append(data_tile)
+        for cell in self.cells:
+            for layer, tile in enumerate(cell):
+                data_tile = TileData()
+                data_tile.object = tile.__class__
+                data_tile.flip = tile.flip
+                data_tile.name = tile.name
+                data_tile.collision = tile.collision
+                data_tile.position = tile.position
+                data_tile.layer = layer
+                data.tiles.append(data_tile)
         return data
 
+    def get_cell(self, position: Vec, clamp: bool = False) -> int | None:
+        x = math.floor((position.x - self.position.x) / TILE_SIZE)
+        y = math.floor((position.y - self.position.y) / TILE_SIZE)
+
+        if clamp:
+            x = min(max(x, 0), Chunk.DEFAULT_SIZE - 1)
+            y = min(max(y, 0), Chunk.DEFAULT_SIZE - 1)
+        elif x < 0 or y < 0 or x >= Chunk.DEFAULT_SIZE or y >= Chunk.DEFAULT_SIZE:
+            return None
+
+        return y * Chunk.DEFAULT_SIZE + x
+
+    def get_tiles(self, position: Vec) -> list[ComponentObject]:
+        cell = self.get_cell(position)
+        return [] if cell is None else list(self.cells[cell])
+
+    def get_tile(self, position: Vec, layer: int = -1) -> ComponentObject | None:
+        cell = self.get_cell(position)
+        if cell is None or not -len(self.cells[cell]) <= layer < len(self.cells[cell]):
+            return None
+        return self.cells[cell][layer]
+
+    def is_collision(self, position: Vec) -> bool:
+        cell = self.get_cell(position)
+        return cell is not None and bool(self.collision_mask >> cell & 1)
+
+    def is_empty(self) -> bool:
+        return len(self.tiles) == 0
+
+    # add without stack policy (loading)
+    def place_tile(self, tile: ComponentObject):
+        cell = self.get_cell(tile.position, True)
+        self.cells[cell].append(tile)
+        self.update_cell(cell)
+
+    # place_tile for a whole batch, the tiles tuple is rebuilt once
+    def place_tiles(self, tiles: list[ComponentObject]):
+        self.place_cells([(self.get_cell(tile.position, True), tile) for tile in tiles])
+
+    # (cell, tile) pairs, tiles are only added so the collision mask only gains bits
+    def place_cells(self, tiles: list[tuple[int, ComponentObject]]):
+        cells = self.cells
+        mask = self.collision_mask
+        for cell, tile in tiles:
+            cells[cell].append(tile)
+            if tile.collision:
+                mask |= 1 << cell
+
+        self.collision_mask = mask
+        self.update_tiles()
+
+    # add following the stack policy, returns (added, removed tiles)
+    def add_tile(self, tile: ComponentObject) -> tuple[bool, list[ComponentObject]]:
+        cell = self.get_cell(tile.position)
+        if cell is None:
+            return (False, [])
+
+        layers = self.cells[cell]
+        removed = []
+
+        if len(layers) != 0:
+            match self.stack_policy:
+                case StackPolicy.REJECT:
+                    return (False, [])
+                case StackPolicy.REPLACE:
+                    removed.append(layers.pop())
+                case StackPolicy.STACK:
+                    if len(layers) >= self.max_layers:
+                        return (False, [])
+
+        layers.append(tile)
+        self.update_cell(cell)
+        return (True, removed)
+
+    def remove_tile(self, position: Vec, layer: int = -1) -> ComponentObject | None:
+        cell = self.get_cell(position)
+        if cell is None or not -len(self.cells[cell]) <= layer < len(self.cells[cell]):
+            return None
+
+        tile = self.cells[cell].pop(layer)
+        self.update_cell(cell)
+        return tile
+
+    def update_cell(self, cell: int):
+        self.update_mask(cell)
+        self.update_tiles()
+
+    def update_mask(self, cell: int):
+        if any(tile.collision for tile in self.cells[cell]):
+            self.collision_mask |= 1 << cell
+        else:
+            self.collision_mask &= ~(1 << cell)
+
+    def update_tiles(self):
+        self.tiles = tuple(tile for layers in self.cells for tile in layers)
+        self.colliders = None
+
+    def get_colliders(self) -> tuple:
+        colliders = self.colliders
+        if colliders is None:
+            colliders = self.colliders = self.build_colliders()
+        return colliders
+
+    # plain full-cell collision tiles are merged into maximal rectangles,
+    # other collision tiles (actions, odd sizes) are kept as they are
+    def build_colliders(self) -> tuple:
+        size = Chunk.DEFAULT_SIZE
+        mergeable = [False] * (size ** 2)
+        colliders = []
+
+        for cell, layers in enumerate(self.cells):
+            if not self.collision_mask >> cell & 1:
+                continue
+
+            origin = self.position + Vec(cell % size, cell // size) * TILE_SIZE
+            for tile in layers:
+                if not tile.collision:
+                    continue
+
+                if not tile.has_action() and tile.position == origin and tile.size == self.tile_size:
+                    mergeable[cell] = True
+                else:
+                    colliders.append(tile)
+
+        for y in range(size):
+            for x in range(size):
+                if not mergeable[y * size + x]:
+                    continue
+
+                width = 1
+                while x + width < size and mergeable[y * size + x + width]:
+                    width += 1
+
+                height = 1
+                while y + height < size and all(mergeable[(y + height) * size + x + i] for i in range(width)):
+                    height += 1
+
+                for j in range(height):
+                    for i in range(width):
+                        mergeable[(y + j) * size + x + i] = False
+
+                colliders.append(CollisionRect(self.position + Vec(x, y) * TILE_SIZE, Vec(width, height) * TILE_SIZE))
+
+        return tuple(colliders)
+
     def creator_mode(self, show):
         self.creator_info = show
 
     def collide(self, position: Vec, size: Vec):
         return self.btp.col_rect_rect(self.position, self.size, position, size)
 
-    def update_view(self):
-        tmp = []
-        for tile in self.tiles:
-            if is_in_view(self.btp, tile.position, tile.size):
-                tmp.append(tile)
-        self.tiles_view = tmp
+    def get_view(self) -> tuple[ComponentObject, ...]:
+        return tuple(tile for tile in self.tiles if is_in_view(self.btp, tile.position, tile.size))
+
+    def on_draw(self, dt: float, tiles_view: tuple[ComponentObject, ...] | None = None):
+        if tiles_view is None:
+            tiles_view = self.tiles
 
-    def on_draw(self, dt: float):
         if self.creator_info:
-            dupli_tile = {}
             collisions = []
 
-            for tile in self.tiles_view:
+            for tile in tiles_view:
                 tile.on_draw(dt)
                 if tile.collision:
                     collisions.append(tile)
 
-                if dupli_tile.get(str(tile.position)) is None:
-                    dupli_tile[str(tile.position)] = 1
-                else:
-                    dupli_tile[str(tile.position)] += 1
-
-            for pos, count in dupli_tile.items():
-                if count > 1:
+            for layers in self.cells:
+                if len(layers) > 1:
                     self.btp.draw_text("x{}".format(
-                        count), from_vec_str(pos), 10, WHITE)
+                        len(layers)), layers[0].position, 10, WHITE)
 
             for col in collisions:
                 self.btp.draw_line(col.position, col.position +
@@ -98,5 +265,5 @@ class Chunk(Component):
             self.btp.draw_rectline(
                 self.position, self.size, Color(255, 0, 0, 255))
         else:
-            for tile in self.tiles_view:
+            for tile in tiles_view:
                 tile.on_draw(dt)
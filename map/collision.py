@@ -0,0 +1,94 @@
+import math
+import threading
+
+from BTP.BTP import *
+from core import *
+
+from map.chunk import Chunk
+from map.tile import CollisionRect
+from utility import TILE_SIZE
+
+
+class CollisionGrid:
+    CELL_SIZE = TILE_SIZE
+
+    def __init__(self) -> None:
+        self.cells: dict[tuple[int, int], list[ObjectBase]] = {}
+        # colliders inserted for each chunk, replaced as a whole when the chunk changes
+        self.chunks: dict[tuple[int, int], tuple[ObjectBase, ...]] = {}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(colliders) for colliders in self.chunks.values())
+
+    @staticmethod
+    def get_range(position: Vec, size: Vec) -> tuple[range, range]:
+        return (
+            range(math.floor(position.x / CollisionGrid.CELL_SIZE), math.ceil((position.x + size.x) / CollisionGrid.CELL_SIZE)),
+            range(math.floor(position.y / CollisionGrid.CELL_SIZE), math.ceil((position.y + size.y) / CollisionGrid.CELL_SIZE))
+        )
+
+    def insert(self, obj: ObjectBase):
+        xrange, yrange = CollisionGrid.get_range(obj.position, obj.size)
+        for y in yrange:
+            for x in xrange:
+                self.cells.setdefault((x, y), []).append(obj)
+
+    def remove(self, obj: ObjectBase):
+        xrange, yrange = CollisionGrid.get_range(obj.position, obj.size)
+        for y in yrange:
+            for x in xrange:
+                cell = self.cells.get((x, y))
+                if cell is None:
+                    continue
+
+                for index, other in enumerate(cell):
+                    if other is obj:
+                        del cell[index]
+                        break
+
+                if len(cell) == 0:
+                    del self.cells[(x, y)]
+
+    def update_chunk(self, chunk: Chunk):
+        colliders = chunk.get_colliders()
+
+        with self.lock:
+            for obj in self.chunks.pop(chunk.key, ()):
+                self.remove(obj)
+
+            for obj in colliders:
+                self.insert(obj)
+
+            if len(colliders) != 0:
+                self.chunks[chunk.key] = colliders
+
+    def remove_chunk(self, chunk: Chunk):
+        with self.lock:
+            for obj in self.chunks.pop(chunk.key, ()):
+                self.remove(obj)
+
+    def clear(self):
+        with self.lock:
+            self.cells.clear()
+            self.chunks.clear()
+
+    # colliders overlapping [position, position + size)
+    def query(self, position: Vec, size: Vec) -> list[ObjectBase]:
+        xrange, yrange = CollisionGrid.get_range(position, size)
+        right = position.x + size.x
+        bottom = position.y + size.y
+
+        result = []
+        seen = set()
+        with self.lock:
+            for y in yrange:
+                for x in xrange:
+                    for obj in self.cells.get((x, y), ()):
+                        if id(obj) in seen:
+                            continue
+                        seen.add(id(obj))
+
+                        if obj.position.x < right and obj.position.x + obj.size.x > position.x and obj.position.y < bottom and obj.position.y + obj.size.y > position.y:
+                            result.append(obj)
+        return result
@@ -0,0 +1,65 @@
+from BTP.BTP import *
+
+import math
+
+from map.chunk import Chunk
+from utility import TILE_SIZE
+
+
+class ChunkIndex:
+
+    def __init__(self) -> None:
+        # insertion ordered, keyed by integer chunk coordinates (cx, cy)
+        self.chunks: dict[tuple[int, int], Chunk] = {}
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def __iter__(self):
+        return iter(tuple(self.chunks.values()))
+
+    def __contains__(self, key: tuple[int, int]) -> bool:
+        return key in self.chunks
+
+    def get(self, key: tuple[int, int]) -> Chunk | None:
+        return self.chunks.get(key)
+
+    def get_at(self, position: Vec) -> Chunk | None:
+        return self.chunks.get(Chunk.get_key(position))
+
+    @staticmethod
+    def get_range(position: Vec, size: Vec) -> tuple[range, range]:
+        # chunk keys overlapping the rect [position, position + size)
+        chunk_size = Chunk.DEFAULT_SIZE * TILE_SIZE
+        return (
+            range(math.floor(position.x / chunk_size), math.ceil((position.x + size.x) / chunk_size)),
+            range(math.floor(position.y / chunk_size), math.ceil((position.y + size.y) / chunk_size))
+        )
+
+    def query(self, position: Vec, size: Vec) -> list[Chunk]:
+        xrange, yrange = ChunkIndex.get_range(position, size)
+
+        # small maps: cheaper to filter the chunks than to probe every key
+        if len(xrange) * len(yrange) > len(self.chunks):
+            return [chunk for chunk in self if chunk.key[0] in xrange and chunk.key[1] in yrange]
+
+        chunks = []
+        for cy in yrange:
+            for cx in xrange:
+                chunk = self.chunks.get((cx, cy))
+                if chunk is not None:
+                    chunks.append(chunk)
+        return chunks
+
+    def add(self, chunk: Chunk) -> Chunk:
+        self.chunks[chunk.key] = chunk
+        return chunk
+
+    def remove(self, chunk: Chunk) -> bool:
+        if self.chunks.get(chunk.key) is not chunk:
+            return False
+        del self.chunks[chunk.key]
+        return True
+
+    def clear(self):
+        self.chunks.clear()
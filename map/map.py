@@ -1,4 +1,7 @@
+import contextlib
+import os
 import random
+import uuid
 from BTP.BTP import *
 from BTP.util import *
 from BTP.gui import *
@@ -6,9 +9,16 @@ from BTP.gui import *
 from core import *
 from utility import TILE_SIZE, DungeonRoleTypes, vec_ceil, DungeonActionData
 
-import threading
-
-from map.chunk import Chunk, ChunkData
+from map.chunk import Chunk, ChunkData, StackPolicy
+from map.index import ChunkIndex
+from map.collision import CollisionGrid
+from map.updater import ViewUpdater
+from map.view import FrameView
+from map.binary import MapFile, MapFileError
+from map.pager import ChunkPager
+from map.autosave import MapAutosave
+from map.bulk import ChunkBuilder
+from map.minimap import Minimap
 from components.character import Character, CharacterData
 
 class MapData:
@@ -20,94 +30,203 @@ class MapData:
 
 
 class MapBase:
+    STREAMING_CHUNKS = 4096  # maps with more chunks are paged from disk around the camera
+    NO_LOCK = contextlib.nullcontext()  # nothing is evicted without a pager
 
     def __init__(self, btp: Win, atlas: ObjectBaseAtlas) -> None:
         self.btp = btp
         self.atlas = atlas
 
-        self.map: list[Chunk] = []
-        self.view_chunks: list[Chunk] = []
-        self.max_chunks: Vec = Vec()
+        self.map: ChunkIndex = ChunkIndex()
+        self.collisions: CollisionGrid = CollisionGrid()
+        self.frame_view: FrameView = FrameView()
 
         self.last_position: Vec = Vec()
         self.last_offset: Vec = Vec()
 
         self.creator_mode = False
-        self.update_thread = False
-        self.force_update = False
+        self.stack_policy = StackPolicy.STACK
+        self.max_layers = Chunk.MAX_LAYERS
+        self.updater = ViewUpdater(self.on_view_update, self.btp.is_running)
+        self.frame_locked = False  # no update thread: step() runs its work once per frame (input sessions, headless)
+
+        self.streaming_chunks = MapBase.STREAMING_CHUNKS
+        self.pager: ChunkPager | None = None
+
+        self.builder = ChunkBuilder(self)
+        self.load_workers = 0  # > 0: chunks are decoded on a thread pool while loading
+
+        self.map_name: str | None = None  # saves go back to the loaded map
+        self.autosave = MapAutosave(self)
+        self.minimap = Minimap(self)
 
         self.entities_refs: list[Character] = []
         self.player_ref: Character
 
     def on_ready(self):
-        self.max_chunks = vec_ceil(
-            (self.btp.get_render_size()/(Chunk.DEFAULT_SIZE * TILE_SIZE))) + 1
-        
         self.player_ref = self.atlas.copy(Character, random.choice(["knight_m", "knight_f"]))
         self.player_ref.action_data = DungeonActionData(role=DungeonRoleTypes.PLAYER)
 
     def start_update_thread(self):
-        if not self.update_thread:
-            threading.Thread(target=self.update_chunks_view).start()
+        if not self.frame_locked:
+            self.updater.start()
+        if self.pager is not None:
+            self.pager.start()
 
     def stop_update_thread(self):
-        self.update_thread = False
+        self.updater.stop()
+        if self.pager is not None:
+            self.pager.stop()
 
-    def force_update_view(self):
-        self.force_update = True
+    # frame locked: the work of the update thread, on the render thread with the frame dt
+    def step(self, dt: float):
+        self.updater.poll()
 
+    def force_update_view(self):
+        self.updater.notify()
+
+    # render thread: wake the updater when the camera moved since the last frame
+    def check_camera(self):
+        position = self.btp.camera_pos
+        offset = self.btp.camera_offset
+
+        if position != self.last_position or offset != self.last_offset:
+            self.last_position = Vec(position.x, position.y)
+            self.last_offset = Vec(offset.x, offset.y)
+            self.updater.notify()
+
+    def setup_chunk(self, chunk: Chunk) -> Chunk:
+        chunk.creator_mode(self.creator_mode)
+        chunk.stack_policy = self.stack_policy
+        chunk.max_layers = self.max_layers
+        return chunk
+
+    def new_chunk(self, key: tuple[int, int]) -> Chunk:
+        return self.setup_chunk(Chunk(self.btp, self.atlas, Chunk.from_key(key)))
+
+    # held by the creator from the chunk lookup to on_chunk_changed, the pager evicts on the view thread
+    def get_edit_lock(self):
+        return self.pager.lock if self.pager is not None else MapBase.NO_LOCK
+
+    # chunk under a position for an edit, paged in first when it was evicted
+    def get_edit_chunk(self, position: Vec) -> Chunk | None:
+        chunk = self.map.get_at(position)
+        if chunk is None and self.pager is not None:
+            chunk = self.pager.page_in(Chunk.get_key(position))
+        return chunk
+
+    # keep the chunk registry and the collision grid in sync after an edit
+    def on_chunk_changed(self, chunk: Chunk):
+        if self.pager is not None:
+            self.pager.on_chunk_changed(chunk)
+        self.autosave.mark(chunk.key)
+        self.minimap.mark(chunk.key)
+
+        if chunk.is_empty():
+            self.map.remove(chunk)
+            self.collisions.remove_chunk(chunk)
+        else:
+            self.collisions.update_chunk(chunk)
+
+
+    # view thread: page in the chunks around the camera center
+    def update_pager(self):
+        # read once: the render thread detaches it on clear_map/export_map
+        pager = self.pager
+        if pager is not None:
+            pager.update(self.btp.camera_pos - self.btp.camera_offset + self.btp.get_render_size() / 2)
 
     def on_view_update(self):
-        tmp = []
-        for chunk in self.map:
-            if self.btp.col_rect_rect(self.btp.camera_pos - self.btp.camera_offset, self.btp.get_render_size(), chunk.position, chunk.size):
-                tmp.append(chunk)
-                chunk.update_view()
+        self.update_pager()
+        chunks = tuple((chunk, chunk.get_view()) for chunk in self.map.query(
+            self.btp.camera_pos - self.btp.camera_offset, self.btp.get_render_size()))
 
-                if len(tmp) >= (self.max_chunks.x * self.max_chunks.y):
-                    break
-
-        self.view_chunks = tmp
+        self.frame_view = FrameView(chunks, (), sum(len(tiles) for chunk, tiles in chunks))
 
     # def on_entities_update(self, dt: float, collisions: list[ComponentObject]):
     #     for entity in self.entities_refs:
     #         entity.on_update_control(dt, collisions)
 
-    def update_chunks_view(self):
-        self.update_thread = True
-        while self.btp.is_running() and self.update_thread:
-            if self.btp.camera_pos != self.last_position or self.btp.camera_offset != self.last_offset or self.force_update:
-                self.last_position = self.btp.camera_pos
-                self.last_offset = self.btp.camera_offset
-
-                if self.force_update:
-                    self.force_update = False
-
-                self.on_view_update()
-
     # draw chunks
-    def on_draw(self, dt: float):
-        for chunk in self.view_chunks:
-            chunk.on_draw(dt)
+    # view: snapshot the caller already read, the whole frame uses the same one
+    def on_draw(self, dt: float, view: FrameView | None = None):
+        if view is None:
+            view = self.frame_view
+        self.check_camera()
+
+        with PROFILER.scope("MapBase.draw_chunks"):
+            for chunk, tiles in view.chunks:
+                chunk.on_draw(dt, tiles)
     
     def clear_map(self):
+        self.autosave.flush()
+        self.autosave.clear()
+        self.map_name = None
+
+        self.close_pager()
+        self.builder.clear()
+        self.minimap.clear()
+
         self.map.clear()
+        self.collisions.clear()
+        self.frame_view = FrameView()
+        self.entities_refs.clear()
 
-    def export_map(self):
+    # a mapped file can't be replaced on Windows: closed before the map is exported, here or from another screen
+    def close_pager(self):
+        if self.pager is not None:
+            self.pager.close()
+            self.pager = None
+
+    def get_map_data(self) -> MapData:
         map_data = MapData()
         map_data.player = self.player_ref.to_data()
 
         for entity in self.entities_refs:
             map_data.entities.append(entity.to_data())
 
-        for chunk in self.map:
-            map_data.chunks.append(chunk.to_data())
+        # the view thread pages chunks in and out: both lists are read from the same resident set
+        with self.get_edit_lock():
+            for chunk in self.map:
+                map_data.chunks.append(chunk.to_data())
+            if self.pager is not None:
+                map_data.chunks += self.pager.get_unloaded_data()
+        return map_data
 
-
-        storage = Storage()
-        storage.state = map_data
+    def export_map(self):
+        map_data = self.get_map_data()
+        # the paged file is replaced below
+        self.close_pager()
+
+        with self.autosave.lock:
+            try:
+                MapFile.write(self.get_map_name() + MapFile.EXTENSION, map_data)
+                self.autosave.reset()
+            except OSError as e:
+                print(e)
+
+    def get_map_name(self) -> str:
+        if self.map_name is None:
+            self.map_name = str(uuid.uuid4())
+        return self.map_name
 
     def load_map(self, name):
+        journal = MapAutosave.read(name, MapFile.get_types(self.atlas))
+        if os.path.exists(name + MapFile.EXTENSION):
+            loaded = self.load_map_file(name + MapFile.EXTENSION, journal)
+        elif MapFile.get_path(name) is None and len(journal) > 0:
+            # never exported: the journal is the whole map
+            self.load_journal(journal)
+            loaded = True
+        else:
+            loaded = self.load_map_storage(name, journal)
+
+        if loaded:
+            self.map_name = name
+        return loaded
+
+    def load_map_storage(self, name, journal: dict[tuple[int, int], ChunkData]):
+
         map_storage = Storage(name)
         if map_storage.state is None:
             return False
@@ -117,14 +236,64 @@ class MapBase:
             map_storage.reset_state(MapData())
             return False
 
-        self.player_ref = Character.from_data(map_data.player, self.atlas)
-        for entitydata in map_data.entities:
-            entity: Character = Character.from_data(entitydata, self.atlas)
-            self.entities_refs = entity
-
+        self.load_entities(map_data.player, map_data.entities)
         for chunkdata in map_data.chunks:
-            chunk: Chunk = Chunk.from_data(chunkdata, self.btp, self.atlas)
-            chunk.creator_mode(self.creator_mode)
-            self.map.append(chunk)
+            if Chunk.get_key(chunkdata.position) not in journal:
+                self.load_chunk(chunkdata)
+        self.load_journal(journal)
+
+        return True
+
+    # autosaved chunks replace the saved ones
+    def load_journal(self, journal: dict[tuple[int, int], ChunkData]):
+        for chunkdata in journal.values():
+            if len(chunkdata.tiles) > 0:
+                self.load_chunk(chunkdata)
+
+    def load_map_file(self, path: str, journal: dict[tuple[int, int], ChunkData]):
+        try:
+            map_file = MapFile(path, MapFile.get_types(self.atlas))
+        except (OSError, MapFileError) as e:
+            print(e)
+            return False
+
+        self.load_entities(*map_file.read_entities())
+
+        # large maps stay open, chunks are read on demand
+        if len(map_file) > self.streaming_chunks:
+            self.pager = ChunkPager(self, map_file)
+            self.pager.edits.update({key: chunkdata if len(chunkdata.tiles) > 0 else None for key, chunkdata in journal.items()})
+            self.minimap.mark_all(list(set(map_file.keys()) | set(journal.keys())))
+            return True
+
+        with map_file:
+            keys = [key for key in map_file.keys() if key not in journal]
+            for chunk in self.builder.load(map_file, keys, self.load_workers):
+                self.add_chunk(chunk)
+        self.load_journal(journal)
 
         return True
+
+    def load_entities(self, player: CharacterData | None, entities: list[CharacterData]):
+        if player is not None:
+            self.player_ref = Character.from_data(player, self.atlas)
+        for entitydata in entities:
+            entity: Character = Character.from_data(entitydata, self.atlas)
+            self.entities_refs.append(entity)
+
+    def load_chunk(self, chunkdata: ChunkData):
+        self.add_chunk(self.builder.from_data(chunkdata))
+
+    # loaded chunks are merged with the chunk already under their key
+    def add_chunk(self, chunk: Chunk):
+        if chunk.is_empty():
+            return
+
+        current = self.map.get(chunk.key)
+        if current is not None:
+            current.place_tiles(chunk.tiles)
+        else:
+            current = self.map.add(chunk)
+
+        self.collisions.update_chunk(current)
+        self.minimap.mark(current.key)
@@ -0,0 +1,278 @@
+import threading
+from operator import itemgetter
+
+from BTP.BTP import *
+from core import ObjectBase, is_animated
+from utility import TILE_SIZE
+
+from map.chunk import Chunk
+
+
+class Minimap:
+    GRID = 64  # overview cells per side at most, the draw calls never exceed GRID²
+    SAMPLES = 4  # tiles sampled per side of an overview cell
+    MAX_UPDATES = 64  # chunk summaries rebuilt per frame
+    BACKGROUND = Color(20, 20, 20, 200)
+    VIEW = Color(250, 249, 246, 255)
+
+    # map_base: MapBase summarized
+    def __init__(self, map_base) -> None:
+        self.map_base = map_base
+
+        # average color of each prototype texture (first frame)
+        self.colors: dict = {}
+        # top layer color of every cell (None: empty), kept for evicted chunks
+        self.summaries: dict[tuple[int, int], tuple] = {}
+
+        self.lock = threading.Lock()
+        self.dirty: set[tuple[int, int]] = set()
+
+        self.bounds: tuple[int, int, int, int] | None = None  # chunk keys: min x, min y, max x, max y
+        self.scale = 1  # tiles per overview cell
+        self.columns = 0
+        self.lines = 0
+        self.grid: dict[tuple[int, int], tuple] = {}
+        # merged runs of same color cells: (position, size, color)
+        self.rows: dict[int, list[tuple[Vec, Vec, Color]]] = {}
+
+        self.position = Vec()
+        self.size = Vec(200)
+
+    def clear(self):
+        with self.lock:
+            self.dirty.clear()
+        self.summaries.clear()
+        self.bounds = None
+        self.grid.clear()
+        self.rows.clear()
+
+    # any thread: the chunk changed (edit, load)
+    def mark(self, key: tuple[int, int]):
+        with self.lock:
+            self.dirty.add(key)
+
+    # streamed map: every chunk in the file, summarized from its records over the next frames
+    def mark_all(self, keys: list[tuple[int, int]]):
+        if len(keys) == 0:
+            return
+
+        with self.lock:
+            self.dirty.update(keys)
+
+        # the whole map is known up front, the overview is not rescaled as the chunks come in
+        bounds = (min(key[0] for key in keys), min(key[1] for key in keys), max(key[0] for key in keys), max(key[1] for key in keys))
+        if self.bounds is not None:
+            bounds = (min(bounds[0], self.bounds[0]), min(bounds[1], self.bounds[1]), max(bounds[2], self.bounds[2]), max(bounds[3], self.bounds[3]))
+        if bounds != self.bounds:
+            self.set_bounds(bounds)
+            self.grid.clear()
+            self.rows.clear()
+
+    def set_rect(self, position: Vec, size: Vec):
+        if position != self.position or size != self.size:
+            self.position = position
+            self.size = size
+            self.build_rows(range(self.lines))
+
+    def contains(self, point: Vec) -> bool:
+        return self.bounds is not None and self.map_base.btp.col_rect_point(self.position, self.size, point)
+
+    # overview point -> world position
+    def get_world_position(self, point: Vec) -> Vec:
+        cell = self.size.x / max(self.columns, self.lines, 1)
+        tiles = (point - self.position) / cell * self.scale
+        return (tiles + Vec(self.bounds[0], self.bounds[1]) * Chunk.DEFAULT_SIZE) * TILE_SIZE
+
+    # render thread only, the texture pixels are read back from the GPU
+    def get_color(self, tile) -> tuple | None:
+        key = tile.prototype if tile.prototype is not None else (type(tile), tile.name)
+        color = self.colors.get(key)
+        if color is None:
+            texture = tile.texture
+            frame = texture.textures[0] if is_animated(texture) else texture.texture
+
+            r = g = b = count = 0
+            for pixel in self.map_base.btp.get_image_pixels(frame):
+                if pixel.a > 0:
+                    r += pixel.r
+                    g += pixel.g
+                    b += pixel.b
+                    count += 1
+
+            color = self.colors[key] = (r // count, g // count, b // count) if count != 0 else (0, 0, 0)
+        return color
+
+    def summarize(self, chunk: Chunk) -> tuple:
+        return tuple(self.get_color(layers[-1]) if len(layers) != 0 else None for layers in chunk.cells)
+
+    # (color, x, y, layer) tiles of a chunk, top layer of each cell kept
+    def summarize_tiles(self, key: tuple[int, int], tiles: list[tuple]) -> tuple | None:
+        origin = Chunk.from_key(key)
+        last = Chunk.DEFAULT_SIZE - 1
+
+        cells = [None] * (Chunk.DEFAULT_SIZE * Chunk.DEFAULT_SIZE)
+        for color, x, y, layer in sorted(tiles, key=itemgetter(3)):
+            if color is None:
+                continue
+            cell_x = min(max(int((x - origin.x) // TILE_SIZE), 0), last)
+            cell_y = min(max(int((y - origin.y) // TILE_SIZE), 0), last)
+            cells[cell_y * Chunk.DEFAULT_SIZE + cell_x] = color
+
+        return tuple(cells) if any(color is not None for color in cells) else None
+
+    def get_object_color(self, classbase, name: str) -> tuple | None:
+        obj = self.map_base.builder.get_object(classbase, name)
+        return self.get_color(obj) if obj is not None else None
+
+    # chunk not paged in: its edited copy once evicted, else its file records (no tile is spawned)
+    def summarize_unloaded(self, pager, key: tuple[int, int]) -> tuple | None:
+        if key in pager.edits:
+            data = pager.edits[key]
+            if data is None:
+                return None
+            return self.summarize_tiles(key, [(self.get_object_color(tile.object, tile.name), tile.position.x, tile.position.y,
+                                               getattr(tile, 'layer', 0)) for tile in data.tiles])
+
+        source = pager.source
+        records = source.read_records(key)
+        if records is None:
+            return None
+
+        strings = source.strings
+        colors = {}
+        tiles = []
+        for classindex, nameindex, x, y, flip_x, flip_y, layer, collision in records:
+            color = colors.get((classindex, nameindex), ())
+            if color == ():
+                color = colors[(classindex, nameindex)] = self.get_object_color(
+                    source.types.get(strings[classindex], ObjectBase), strings[nameindex])
+            tiles.append((color, x, y, layer))
+        return self.summarize_tiles(key, tiles)
+
+    def get_tile_color(self, x: int, y: int) -> tuple | None:
+        summary = self.summaries.get((x // Chunk.DEFAULT_SIZE, y // Chunk.DEFAULT_SIZE))
+        if summary is None:
+            return None
+        return summary[(y % Chunk.DEFAULT_SIZE) * Chunk.DEFAULT_SIZE + x % Chunk.DEFAULT_SIZE]
+
+    # average of a few tiles sampled in the cell, the cost does not grow with the scale
+    def get_cell_color(self, gx: int, gy: int) -> tuple | None:
+        origin_x = self.bounds[0] * Chunk.DEFAULT_SIZE + gx * self.scale
+        origin_y = self.bounds[1] * Chunk.DEFAULT_SIZE + gy * self.scale
+        step = max(1, self.scale // Minimap.SAMPLES)
+
+        r = g = b = count = 0
+        for y in range(origin_y, origin_y + self.scale, step):
+            for x in range(origin_x, origin_x + self.scale, step):
+                color = self.get_tile_color(x, y)
+                if color is not None:
+                    r += color[0]
+                    g += color[1]
+                    b += color[2]
+                    count += 1
+
+        return (r // count, g // count, b // count) if count != 0 else None
+
+    def set_bounds(self, bounds: tuple[int, int, int, int]):
+        self.bounds = bounds
+        width = (bounds[2] - bounds[0] + 1) * Chunk.DEFAULT_SIZE
+        height = (bounds[3] - bounds[1] + 1) * Chunk.DEFAULT_SIZE
+
+        self.scale = max(1, -(-max(width, height) // Minimap.GRID))
+        self.columns = -(-width // self.scale)
+        self.lines = -(-height // self.scale)
+
+    def build_rows(self, lines):
+        cell = self.size.x / max(self.columns, self.lines, 1)
+        for gy in lines:
+            runs = []
+            start = 0
+            for gx in range(1, self.columns + 1):
+                color = self.grid.get((start, gy))
+                if gx < self.columns and self.grid.get((gx, gy)) == color:
+                    continue
+
+                if color is not None:
+                    runs.append((self.position + Vec(start, gy) * cell, Vec(gx - start, 1) * cell, Color(color[0], color[1], color[2], 255)))
+                start = gx
+            self.rows[gy] = runs
+
+    # render thread: rebuild the summaries of a bounded number of changed chunks
+    def update(self):
+        with self.lock:
+            keys = []
+            while len(self.dirty) != 0 and len(keys) < Minimap.MAX_UPDATES:
+                keys.append(self.dirty.pop())
+
+        if len(keys) == 0:
+            return
+
+        pager = self.map_base.pager
+        for key in keys:
+            chunk = self.map_base.map.get(key)
+            if chunk is not None and not chunk.is_empty():
+                summary = self.summarize(chunk)
+            elif chunk is None and pager is not None and pager.exists(key):
+                try:
+                    summary = self.summarize_unloaded(pager, key)
+                except ValueError:
+                    # map closed meanwhile
+                    summary = None
+            else:
+                summary = None
+
+            if summary is None:
+                self.summaries.pop(key, None)
+            else:
+                self.summaries[key] = summary
+
+        # the overview only grows, a bounds change rescales every cell
+        bounds = self.bounds
+        for key in keys:
+            if key in self.summaries:
+                bounds = (key[0], key[1], key[0], key[1]) if bounds is None else \
+                    (min(bounds[0], key[0]), min(bounds[1], key[1]), max(bounds[2], key[0]), max(bounds[3], key[1]))
+        if bounds is None:
+            return
+
+        if bounds != self.bounds:
+            self.set_bounds(bounds)
+            cells = [(gx, gy) for gy in range(self.lines) for gx in range(self.columns)]
+        else:
+            cells = set()
+            for key in keys:
+                x = (key[0] - bounds[0]) * Chunk.DEFAULT_SIZE // self.scale
+                y = (key[1] - bounds[1]) * Chunk.DEFAULT_SIZE // self.scale
+                last_x = ((key[0] - bounds[0] + 1) * Chunk.DEFAULT_SIZE - 1) // self.scale
+                last_y = ((key[1] - bounds[1] + 1) * Chunk.DEFAULT_SIZE - 1) // self.scale
+                cells.update((gx, gy) for gy in range(y, last_y + 1) for gx in range(x, last_x + 1))
+
+        if len(cells) == self.columns * self.lines:
+            self.grid.clear()
+        for cell in cells:
+            color = self.get_cell_color(*cell)
+            if color is None:
+                self.grid.pop(cell, None)
+            else:
+                self.grid[cell] = color
+
+        self.build_rows(range(self.lines) if len(cells) == self.columns * self.lines else {gy for gx, gy in cells})
+
+    # ui layer, screen coordinates
+    def on_draw(self, dt: float):
+        self.update()
+        if self.bounds is None:
+            return
+
+        btp = self.map_base.btp
+        btp.draw_rect(self.position, self.size, Minimap.BACKGROUND)
+        for runs in self.rows.values():
+            for position, size, color in runs:
+                btp.draw_rect(position, size, color)
+
+        # camera view
+        cell = self.size.x / max(self.columns, self.lines, 1)
+        origin = Vec(self.bounds[0], self.bounds[1]) * (Chunk.DEFAULT_SIZE * TILE_SIZE)
+        view_position = (btp.camera_pos - btp.camera_offset - origin) / (TILE_SIZE * self.scale) * cell
+        view_size = btp.get_render_size() / (TILE_SIZE * self.scale) * cell
+        btp.draw_rectline(self.position + view_position, view_size, Minimap.VIEW)
@@ -0,0 +1,294 @@
+import math
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from BTP.BTP import *
+from core import PROFILER
+from utility import TILE_SIZE
+
+from map.chunk import Chunk, ChunkData
+from map.binary import MapFile
+
+
+class ChunkPager:
+    RADIUS = 3  # chunks loaded around the focus (camera center)
+    PREFETCH = 2  # chunks prefetched ahead along the movement direction
+    MEMORY_BUDGET = 100_000  # resident tiles before distant chunks are evicted
+
+    # map_base: MapBase owning the chunk index and the collision grid
+    def __init__(self, map_base, source: MapFile) -> None:
+        self.map_base = map_base
+        self.source = source
+
+        self.radius = ChunkPager.RADIUS
+        self.prefetch = ChunkPager.PREFETCH
+        self.memory_budget = ChunkPager.MEMORY_BUDGET
+
+        # resident keys, least recently in range first
+        self.resident: OrderedDict[tuple[int, int], None] = OrderedDict()
+        # chunks edited since they were read, kept as data once evicted (None: edited away)
+        self.dirty: set[tuple[int, int]] = set()
+        self.edits: dict[tuple[int, int], ChunkData | None] = {}
+
+        # also held by creator edits (get_edit_lock): eviction can't drop a chunk being edited
+        self.lock = threading.RLock()
+        self.ready: dict[tuple[int, int], Chunk | None] = {}
+        self.pending: set[tuple[int, int]] = set()
+        self.requests: queue.Queue = queue.Queue()
+        self.running = False
+        self.thread: threading.Thread | None = None
+        self.closed = False  # chunks read meanwhile are dropped, nothing is evicted anymore
+
+        self.focus: tuple[int, int] | None = None
+        self.direction: tuple[int, int] = (0, 0)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.loads = 0
+        self.load_time = 0.0
+
+    def start(self):
+        if self.running:
+            return
+
+        # the stopped worker takes the wake up meant for it, never the new one's
+        self.join()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.running:
+            self.running = False
+            self.requests.put(None)
+
+    def join(self):
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    # the prefetch worker is done with the source before it is closed, a read on the view thread
+    # meanwhile gets the ValueError of a closed map file
+    def close(self):
+        self.stop()
+        self.join()
+        with self.lock:
+            self.closed = True
+            self.source.close()
+
+    def exists(self, key: tuple[int, int]) -> bool:
+        if key in self.edits:
+            return self.edits[key] is not None
+        return key in self.source
+
+    # file chunk, or its edited copy when it was evicted after an edit
+    def read(self, key: tuple[int, int]) -> Chunk | None:
+        start_time = time.perf_counter()
+
+        if key in self.edits:
+            data = self.edits[key]
+            chunk = self.map_base.builder.from_data(data) if data is not None else None
+        else:
+            chunk = self.map_base.builder.from_file(self.source, key)
+
+        if chunk is not None and chunk.is_empty():
+            chunk = None
+
+        with self.lock:
+            self.loads += 1
+            self.load_time += time.perf_counter() - start_time
+        return chunk
+
+    # prefetch worker
+    def run(self):
+        while self.running:
+            key = self.requests.get()
+            if key is None:
+                continue
+
+            try:
+                with PROFILER.scope("ChunkPager.read"):
+                    chunk = self.read(key)
+            except ValueError:
+                # source closed meanwhile
+                continue
+
+            with self.lock:
+                if key in self.pending:
+                    self.pending.discard(key)
+                    self.ready[key] = chunk
+
+    def request(self, key: tuple[int, int]):
+        with self.lock:
+            if key in self.pending or key in self.ready or key in self.resident:
+                return
+            self.pending.add(key)
+        self.requests.put(key)
+
+    def get_range(self, focus: tuple[int, int], radius: int) -> list[tuple[int, int]]:
+        return [(x, y) for y in range(focus[1] - radius, focus[1] + radius + 1)
+                for x in range(focus[0] - radius, focus[0] + radius + 1)]
+
+    # the radius always covers the screen
+    def get_radius(self) -> int:
+        chunk_size = Chunk.DEFAULT_SIZE * TILE_SIZE
+        screen = self.map_base.btp.get_render_size()
+        return max(self.radius, math.ceil(max(screen.x, screen.y) / chunk_size / 2) + 1)
+
+    # view thread: load the chunks around the focus, prefetch ahead, evict over budget
+    def update(self, position: Vec):
+        if self.closed:
+            return
+
+        focus = Chunk.get_key(position)
+        if self.focus is not None and focus != self.focus:
+            self.direction = (max(-1, min(1, focus[0] - self.focus[0])), max(-1, min(1, focus[1] - self.focus[1])))
+        self.focus = focus
+
+        radius = self.get_radius()
+        needed = self.get_range(focus, radius)
+        for key in needed:
+            if key in self.resident:
+                self.resident.move_to_end(key)
+                continue
+            if not self.exists(key):
+                continue
+
+            with self.lock:
+                prefetched = key in self.ready
+                chunk = self.ready.pop(key, None)
+                self.pending.discard(key)
+
+            if prefetched:
+                self.hits += 1
+            else:
+                self.misses += 1
+                try:
+                    chunk = self.read(key)
+                except ValueError:
+                    # closed meanwhile (clear_map, export_map)
+                    return
+
+            if chunk is not None:
+                with self.lock:
+                    # the creator may have paged it in meanwhile, or the map was closed
+                    if key not in self.resident and not self.closed:
+                        self.add(chunk)
+
+        # the band just outside the radius, on the side the focus moves to
+        if self.direction != (0, 0):
+            for key in self.get_range(focus, radius + self.prefetch):
+                x, y = key[0] - focus[0], key[1] - focus[1]
+                if abs(x) <= radius and abs(y) <= radius:
+                    continue
+                if x * self.direction[0] + y * self.direction[1] > 0 and key not in self.resident and self.exists(key):
+                    self.request(key)
+
+        self.drop_ready(focus, radius + self.prefetch * 2)
+        self.evict(set(needed))
+
+    def add(self, chunk: Chunk):
+        current = self.map_base.map.get(chunk.key)
+        if current is None:
+            current = self.map_base.map.add(chunk)
+        else:
+            # created in the creator before the file chunk was paged in
+            current.place_tiles(chunk.tiles)
+
+        self.resident[current.key] = None
+        self.map_base.collisions.update_chunk(current)
+        self.map_base.minimap.mark(current.key)
+
+    # creator edit out of the resident range: the saved chunk comes back before it is changed
+    def page_in(self, key: tuple[int, int]) -> Chunk | None:
+        with self.lock:
+            if key not in self.resident and self.exists(key):
+                self.ready.pop(key, None)
+                self.pending.discard(key)
+                chunk = self.read(key)
+                if chunk is not None:
+                    self.add(chunk)
+            return self.map_base.map.get(key)
+
+    # every chunk under the rect is resident (or has nothing to page in)
+    def is_loaded(self, position: Vec, size: Vec) -> bool:
+        start, end = Chunk.get_key(position), Chunk.get_key(position + size)
+        return all(key in self.resident or not self.exists(key)
+                   for key in ((x, y) for y in range(start[1], end[1] + 1) for x in range(start[0], end[0] + 1)))
+
+    # prefetched chunks the focus moved away from
+    def drop_ready(self, focus: tuple[int, int], distance: int):
+        with self.lock:
+            for key in list(self.ready):
+                if abs(key[0] - focus[0]) > distance or abs(key[1] - focus[1]) > distance:
+                    del self.ready[key]
+
+    def get_resident_tiles(self) -> int:
+        return sum(len(chunk.tiles) for chunk in self.map_base.map)
+
+    def evict(self, needed: set[tuple[int, int]]):
+        tiles = self.get_resident_tiles()
+        for key in list(self.resident):
+            if tiles <= self.memory_budget:
+                break
+            if key in needed:
+                continue
+
+            # an edit between the dirty check and the removal would be lost
+            with self.lock:
+                if self.closed:
+                    return
+                if key not in self.resident:
+                    continue
+                chunk = self.map_base.map.get(key)
+                del self.resident[key]
+                if chunk is None:
+                    continue
+
+                if key in self.dirty:
+                    self.edits[key] = chunk.to_data()
+                    self.dirty.discard(key)
+
+                tiles -= len(chunk.tiles)
+                self.map_base.map.remove(chunk)
+                self.map_base.collisions.remove_chunk(chunk)
+                self.evictions += 1
+
+    # creator edit on a resident chunk (or a new one)
+    def on_chunk_changed(self, chunk: Chunk):
+        with self.lock:
+            if chunk.is_empty():
+                self.resident.pop(chunk.key, None)
+                self.dirty.discard(chunk.key)
+                self.edits[chunk.key] = None
+            else:
+                self.resident[chunk.key] = None
+                self.dirty.add(chunk.key)
+
+    # chunks not resident, for a full export
+    def get_unloaded_data(self) -> list[ChunkData]:
+        chunks = []
+        for key in set(self.source.keys()) | set(self.edits.keys()):
+            if key in self.resident:
+                continue
+
+            data = self.edits[key] if key in self.edits else self.source.read_chunk(key)
+            if data is not None:
+                chunks.append(data)
+        return chunks
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            loads, load_time = self.loads, self.load_time
+
+        return {
+            "resident": len(self.resident),
+            "tiles": self.get_resident_tiles(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "load_ms": load_time / loads * 1000 if loads != 0 else 0.0
+        }
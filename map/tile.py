@@ -1,5 +1,6 @@
 from typing import Any
 from BTP.BTP import *
+from core import ActionEvent
 
 class TileData:
 
@@ -9,3 +10,20 @@ class TileData:
         self.flip: Vec
         self.name: str
         self.collision: bool
+        self.layer: int = 0  # stack index inside the chunk cell
+
+
+# merged collider standing for several plain collision tiles
+class CollisionRect:
+
+    def __init__(self, position: Vec, size: Vec) -> None:
+        self.name = "collision_rect"
+        self.position = position
+        self.size = size
+        self.collision = True
+
+    def accept_action(self, name) -> bool:
+        return False
+
+    def on_action(self, action: ActionEvent) -> Any:
+        return None
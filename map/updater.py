@@ -0,0 +1,90 @@
+import threading
+import time
+from typing import Callable
+
+from core.profiler import PROFILER
+
+
+class ViewUpdater:
+    COALESCE_DELAY = 1 / 240  # notifications arriving meanwhile share one update
+    IDLE_TIMEOUT = 0.25  # how often a sleeping updater checks the window is still running
+
+    def __init__(self, update: Callable[[], None], is_running: Callable[[], bool]) -> None:
+        self.update = update
+        self.is_running = is_running
+
+        self.wake = threading.Event()
+        self.running = False
+        self.generation = 0  # a restarted updater never shares the loop with the old thread
+
+        self.notifications = 0
+        self.wakeups = 0
+        self.updates = 0
+
+        self.last_sample = time.perf_counter()
+        self.last_counts = (0, 0, 0)
+        self.rates = (0.0, 0.0, 0.0)
+
+    def start(self):
+        if self.running:
+            return
+
+        self.running = True
+        self.generation += 1
+        threading.Thread(target=self.run, args=(self.generation,), daemon=True).start()
+
+    def stop(self):
+        self.running = False
+        self.generation += 1
+        self.wake.set()
+
+    def notify(self):
+        self.notifications += 1
+        self.wake.set()
+
+    # calling thread: the pending update, for loops that never start the thread (headless)
+    def poll(self) -> bool:
+        if not self.wake.is_set():
+            return False
+
+        self.wake.clear()
+        self.run_update()
+        return True
+
+    # a failed update is reported, the next notification updates the view again
+    def run_update(self):
+        with PROFILER.scope("ViewUpdater.update"):
+            try:
+                self.update()
+            except Exception as e:
+                print(e)
+        self.updates += 1
+
+    def run(self, generation: int):
+        try:
+            while self.generation == generation and self.is_running():
+                woken = self.wake.wait(ViewUpdater.IDLE_TIMEOUT)
+                self.wakeups += 1
+                if not woken or self.generation != generation:
+                    continue
+
+                time.sleep(ViewUpdater.COALESCE_DELAY)
+                self.wake.clear()
+                self.run_update()
+        finally:
+            # start() can run a new thread whatever stopped this one
+            if self.generation == generation:
+                self.running = False
+
+    # (notifications, wakeups, updates) per second, refreshed at most once per second
+    def get_rates(self) -> tuple[float, float, float]:
+        now = time.perf_counter()
+        elapsed = now - self.last_sample
+
+        if elapsed >= 1:
+            counts = (self.notifications, self.wakeups, self.updates)
+            self.rates = tuple((count - last) / elapsed for count, last in zip(counts, self.last_counts))
+            self.last_counts = counts
+            self.last_sample = now
+
+        return self.rates
@@ -0,0 +1,12 @@
+from dataclasses import dataclass, field
+
+from core import ComponentObject
+from map.chunk import Chunk
+
+
+# built by the update threads, published with a single assignment and only read by the renderer
+@dataclass(frozen=True)
+class FrameView:
+    chunks: tuple[tuple[Chunk, tuple[ComponentObject, ...]], ...] = field(default=())
+    collisions: tuple[ComponentObject, ...] = field(default=())
+    tile_count: int = field(default=0)
@@ -29,6 +29,14 @@ class MapCreator(MapBase):
         self.flip = Vec(1)
         self.collision_mode = False
 
+    def start_update_thread(self):
+        super().start_update_thread()
+        self.autosave.start()
+
+    def stop_update_thread(self):
+        super().stop_update_thread()
+        self.autosave.stop()
+
     # setup -> thread + ui
     def on_ready(self):
         tile_size = TILE_SIZE/2
@@ -116,7 +124,12 @@ class MapCreator(MapBase):
         if self.btp.camera_zoom != 1:
             self.btp.camera_zoom = 1
 
-        if self.btp.mouse.x > self.btp.get_render_size().x*0.22:
+        if self.minimap.contains(self.btp.mouse):
+            if self.btp.is_mouse_pressed():
+                self.btp.camera_pos = self.minimap.get_world_position(self.btp.mouse) - self.btp.get_render_size() / 2
+                self.fix_camera_pos()
+
+        elif self.btp.mouse.x > self.btp.get_render_size().x*0.22:
 
             if self.btp.is_mouse_pressed():
                 self.fix_camera_pos()
@@ -126,14 +139,10 @@ class MapCreator(MapBase):
                 ) + self.btp.camera_pos
 
                 if self.selected is not None:
-                    cp = self.selected.copy()
-                    cp.position = pos
-                    cp.flip = Vec(self.flip.x, self.flip.y)
-                    cp.size *= 2
-                    if self.collision_mode:
-                        cp.collision = True
-
-                    self.map_add(cp)
+                    cp = self.atlas.spawn(type(self.selected), self.selected.name, pos,
+                                          Vec(self.flip.x, self.flip.y), self.collision_mode)
+                    if cp is not None:
+                        self.map_add(cp)
                 else:
                     self.map_remove(pos)
             else:
@@ -157,10 +166,14 @@ class MapCreator(MapBase):
         self.btp.draw_rect(Vec(), self.btp.get_render_size()
                            * Vec(0.22, 1), BLACK)
 
+        self.minimap.set_rect(Vec(self.btp.get_render_size().x - self.minimap.size.x - 10, 10), self.minimap.size)
+        self.minimap.on_draw(dt)
+
         btne_color = WHITE, Color(0, 0, 0, 50)
         if self.exit_btn.is_hover():
             btne_color = Color(230, 230, 230, 255), Color(0, 0, 0, 200)
         if self.exit_btn.draw(*btne_color):
+            self.autosave.discard()
             return NextScreen(DungeonScreens.MENU)
 
         btni_color = WHITE, Color(0, 0, 0, 50)
@@ -205,9 +218,21 @@ class MapCreator(MapBase):
             self.infos["Flip (x,y)"] = "{},{}".format(
                 self.flip.x < 0, self.flip.y < 0)
             self.infos["Collision"] = str(self.collision_mode)
+            self.infos["Stack"] = "{} (max {})".format(self.stack_policy, self.max_layers)
             self.infos["Keyboard"] = "\nMove camera = [Arrows]\nFlipX = [CTRL-R]\nFlipY = [CTRL-L]\nReset/Unselect = [SPACE]\nCollision = [ENTER]"
             self.infos["Position"] = self.btp.camera_pos
             self.infos["Chunk"] = len(self.map)
+
+            notifications, wakeups, updates = self.updater.get_rates()
+            self.infos["Wakeups/s"] = round(wakeups)
+            self.infos["Updates/s"] = round(updates)
+            if self.pager is not None:
+                stats = self.pager.get_stats()
+                self.infos["Paging"] = "{} chunks, {} hits, {} misses, {:.2f} ms/load".format(
+                    stats["resident"], stats["hits"], stats["misses"], stats["load_ms"])
+            if PROFILER.enabled:
+                for name, line in PROFILER.get_lines().items():
+                    self.infos[name] = line
             if self.selected is not None:
                 self.infos["Item Type"] = type(self.selected).__name__.lower()
                 self.infos["Item Name"] = self.selected.name
@@ -219,35 +244,20 @@ class MapCreator(MapBase):
 
     # remove add tile
     def map_add(self, item: ComponentObject):
-        c_pos: Vec = vec_floor(item.position/(TILE_SIZE *
-                               Chunk.DEFAULT_SIZE)) * (TILE_SIZE * Chunk.DEFAULT_SIZE)
-
-        chunk = list(filter(lambda chunk: chunk.position == c_pos, self.map))
-        if chunk is not None and len(chunk) >= 1:
-            chunk[0].tiles.append(item)
-        else:
-            newc = Chunk(self.btp, self.atlas, c_pos)
-            newc.creator_mode(True)
-            newc.tiles.append(item)
-
-            self.map.append(newc)
+        with self.get_edit_lock():
+            chunk = self.get_edit_chunk(item.position)
+            if chunk is None:
+                chunk = self.map.add(self.new_chunk(Chunk.get_key(item.position)))
 
+            chunk.add_tile(item)
+            self.on_chunk_changed(chunk)
         self.force_update_view()
 
     def map_remove(self, position: Vec):
-        c_pos: Vec = vec_floor(position/(Chunk.DEFAULT_SIZE *
-                               TILE_SIZE)) * (Chunk.DEFAULT_SIZE * TILE_SIZE)
-
-        chunk = list(filter(lambda chunk: chunk.position == c_pos, self.map))
-        if chunk is not None and len(chunk) == 1:
-            chunk = chunk[0]
-
-            tile = list(
-                filter(lambda tile: tile.position == position, chunk.tiles))
-            if tile is not None and len(tile) >= 1:
-                chunk.tiles.remove(tile[0])
-                if len(chunk.tiles) <= 0:
-                    self.map.remove(chunk)
+        with self.get_edit_lock():
+            chunk = self.get_edit_chunk(position)
+            if chunk is not None and chunk.remove_tile(position) is not None:
+                self.on_chunk_changed(chunk)
         self.force_update_view()
 
     def fix_camera_pos(self):
@@ -22,6 +22,8 @@ class Game(Screen):
     
     def close_game(self):
         self.map.stop_update_thread()
+        # the creator may export the same map next
+        self.map.close_pager()
 
     def new_game(self, name):
         self.map.clear_map()
@@ -62,8 +64,19 @@ class Game(Screen):
 
         self.stats["FPS"] = round(1/dt) if dt != 0 else 0
         self.stats["Key"] = self.last_key
-        self.stats["View chunk"] = len(self.map.view_chunks)
-        self.stats["View tile"] = self.map.view_tile_count
+        view = self.map.frame_view
+        self.stats["View chunk"] = len(view.chunks)
+        self.stats["View tile"] = view.tile_count
+        notifications, wakeups, updates = self.map.updater.get_rates()
+        self.stats["Wakeups/s"] = round(wakeups)
+        self.stats["Updates/s"] = round(updates)
+        if self.map.pager is not None:
+            stats = self.map.pager.get_stats()
+            self.stats["Paging"] = "{} chunks, {} hits, {} misses, {:.2f} ms/load".format(
+                stats["resident"], stats["hits"], stats["misses"], stats["load_ms"])
+        if PROFILER.enabled:
+            for name, line in PROFILER.get_lines().items():
+                self.stats[name] = line
 
         self.stats.on_draw(Vec(), 20, BLACK)
 
@@ -8,46 +8,34 @@ from utility import center_rect
 
 
 class GameMap(MapBase):
+    ENTITIES_TICK = 1 / 60
+    ENTITIES_ZONE = Vec(3)  # area around an entity that must be paged in for it to move
 
     def __init__(self, btp: Win, atlas: ObjectBaseAtlas) -> None:
         super().__init__(btp, atlas)
-        self.player_tiles_collision: list[ComponentObject] = []
-        self.view_tile_count = 0
+        self.entities_generation = 0
         
 
-    def on_character_view_update(self, position: Vec, size: Vec, zone: Vec = Vec(1,1)):
-        chunks = []
-        collisions = []
-        tcount = 0
-
-        screen_size = self.btp.get_render_size()
-        screen_position = position - (self.btp.get_render_size() - size)/2
-        
+    def get_collisions(self, position: Vec, size: Vec, zone: Vec = Vec(1,1)) -> tuple[ComponentObject, ...]:
         zone_size = size * zone
         zone_position = center_rect(position, size, zone_size)
 
-        for chunk in self.map:
-            if self.btp.col_rect_rect(screen_position, screen_size, chunk.position, chunk.size):
-                chunks.append(chunk)
-
-                chunk.update_view()
-                tcount += len(chunk.tiles_view)
+        return tuple(self.collisions.query(zone_position, zone_size))
 
-                for tile in chunk.tiles_view:
-                    if tile.collision and self.btp.col_rect_rect(tile.position, tile.size, zone_position, zone_size) and isinstance(tile, ComponentObject):
-                        collisions.append(tile)
-
-                if len(chunks) >= (self.max_chunks.x * self.max_chunks.y):
-                    break
+    def on_character_view_update(self, position: Vec, size: Vec, zone: Vec = Vec(1,1)) -> FrameView:
+        screen_size = self.btp.get_render_size()
+        screen_position = position - (self.btp.get_render_size() - size)/2
 
+        chunks = tuple((chunk, chunk.get_view()) for chunk in self.map.query(screen_position, screen_size))
 
-        return (chunks, collisions, tcount)
+        return FrameView(chunks, self.get_collisions(position, size, zone), sum(len(tiles) for chunk, tiles in chunks))
 
     def on_view_update(self):
+        self.update_pager()
         size = (self.btp.get_render_size() - self.btp.camera_offset*2)
         position = self.btp.camera_pos
         
-        self.view_chunks, self.player_tiles_collision, self.view_tile_count = self.on_character_view_update(position, size, Vec(3))
+        self.frame_view = self.on_character_view_update(position, size, Vec(3))
         
 
     def on_draw_ui(self, dt: float):
@@ -55,31 +43,70 @@ class GameMap(MapBase):
 
     def start_update_thread(self):
         super().start_update_thread()
+        if self.frame_locked:
+            return
+
+        self.entities_generation += 1
+        threading.Thread(target=self.entities_update_thread, args=(self.entities_generation,), daemon=True).start()
 
-        if self.update_thread:
-            threading.Thread(target=self.entities_update_thread).start()            
+    def stop_update_thread(self):
+        super().stop_update_thread()
+        self.entities_generation += 1
 
-    def entities_update_thread(self):
-        start_time = time.time()
-        end_time = time.time()
+    def entities_update_thread(self, generation: int):
+        last_time = time.perf_counter()
 
-        while self.update_thread and self.btp.is_running():
-            dt = start_time - end_time
-            end_time = start_time
-            start_time = time.time()
+        while self.entities_generation == generation and self.btp.is_running():
+            time.sleep(GameMap.ENTITIES_TICK)
 
+            now = time.perf_counter()
+            dt = now - last_time
+            last_time = now
+
+            self.update_entities(dt)
+
+    # frame locked: the entities are updated with the frame dt, between the seeds of the input session
+    def step(self, dt: float):
+        super().step(dt)
+        self.update_entities(dt)
+
+    # streamed map: the collision grid only holds the paged in chunks, an entity whose surroundings
+    # are not resident would walk through their walls
+    def is_entity_loaded(self, entity: Character) -> bool:
+        pager = self.pager
+        if pager is None:
+            return True
+
+        position, size = entity.get_rect()
+        zone_size = size * GameMap.ENTITIES_ZONE
+        return pager.is_loaded(center_rect(position, size, zone_size), zone_size)
+
+    # entities control and actions, the view is updated when one of them moved
+    def update_entities(self, dt: float) -> bool:
+        moved = False
+        with PROFILER.scope("GameMap.update_entities"):
             for entity in self.entities_refs:
-                chunks, collisions, tcount = self.on_character_view_update(*entity.get_rect())
-                entity.on_update_control(dt, collisions)
-            
+                # frozen until the chunks around it are paged in
+                if not self.is_entity_loaded(entity):
+                    continue
+                position = Vec(entity.position.x, entity.position.y)
+
+                entity.on_update_control(dt, self.get_collisions(*entity.get_rect()))
+
+                moved = moved or entity.position != position
+
+        if moved:
+            self.updater.notify()
+        return moved
 
     def on_draw(self, dt: float):
-        super().on_draw(dt)
+        view = self.frame_view
+        super().on_draw(dt, view)
 
         for entity in self.entities_refs:
             entity.on_draw(dt)
 
-        self.player_ref.on_update_control(dt, self.player_tiles_collision)
+        self.player_ref.on_update_control(dt, view.collisions)
         self.player_ref.on_draw(dt)
 
 
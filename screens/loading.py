@@ -5,9 +5,9 @@ from utility import BLACK, WHITE
 
 class Loading(Screen):
 
-    def __init__(self, btp: Win, atlas: ObjectBaseAtlas) -> None:
+    def __init__(self, btp: Win, atlas: ObjectBaseAtlas, progress: LoadingProgress) -> None:
         super().__init__(btp, atlas)
-        self.loading = 0
+        self.progress = progress
 
     def center_text(self, text: str, size: int):
         tsize = self.btp.text_size(text, size)
@@ -40,10 +40,11 @@ class Loading(Screen):
 
         self.btp.draw_text(text, pos, 40, BLACK)
         self.btp.draw_rect(Vec(pos.x, pos.y + 60),
-                           Vec(tsize.x * (self.loading/100), 20), BLACK)
+                           Vec(tsize.x * self.progress.get_ratio(), 20), BLACK)
 
-        self.loading += dt * 30
-        if self.loading >= 100:
-            self.loading = 0
+        detail = "{} {}/{} files ({:.0f}/{:.0f} KB) {}".format(
+            self.progress.phase, self.progress.files_done, self.progress.files_total,
+            self.progress.bytes_done / 1024, self.progress.bytes_total / 1024, self.progress.current)
+        self.btp.draw_text(detail, Vec(pos.x, pos.y + 100), 20, BLACK)
 
         return NextScreen()
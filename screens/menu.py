@@ -1,12 +1,13 @@
 from core import *
 from components import *
 
-import os
 from utility import BLACK, WHITE, DungeonScreens
 from BTP.gui import Button, Input
+from map import MapFile, MapCatalog, MapSort
 
 class Menu(Screen):
-    
+    MAX_MAPS = 12  # maps listed per page, the wheel or the arrows turn the pages
+    SORTS = [MapSort.MODIFIED, MapSort.NAME, MapSort.TILES]
 
     def __init__(self, btp: Win, atlas: ObjectBaseAtlas) -> None:
         super().__init__(btp, atlas)
@@ -17,6 +18,14 @@ class Menu(Screen):
         self.selected_map = ""
         self.last_selected = ""
 
+        self.catalog = MapCatalog()
+        self.map_sort = MapSort.MODIFIED
+        self.btn_sort = Button(self.btp)
+        self.map_buttons: list[tuple[str, Button]] = []
+        self.map_page = 0
+        self.btn_previous = Button(self.btp)
+        self.btn_next = Button(self.btp)
+
     def on_load(self):
         margin = Vec(40, 10)
         fontsize = 30
@@ -35,9 +44,71 @@ class Menu(Screen):
         self.btn_select.build("Load & Play", wt + position, margin, fontsize)
 
     def get_first_map(self):
-        file = [f.replace('.dat', '')
-                for f in os.listdir(".") if f.endswith('.dat')]
-        return file[0] if len(file) > 0 else ""
+        self.catalog.refresh()
+        self.map_page = 0
+        self.build_map_list()
+
+        maps = self.catalog.get_maps(self.map_sort)
+        return maps[0].name if len(maps) > 0 else ""
+
+    def get_pages(self) -> int:
+        return max(1, -(-len(self.catalog.maps) // Menu.MAX_MAPS))
+
+    def build_map_list(self):
+        self.map_page = min(max(self.map_page, 0), self.get_pages() - 1)
+
+        position = Vec(20)
+        self.btn_sort.build("Maps ({}) by {}, page {}/{}".format(len(self.catalog.maps), self.map_sort, self.map_page + 1, self.get_pages()),
+                            position, Vec(10, 5), 20)
+
+        self.map_buttons = []
+        start = self.map_page * Menu.MAX_MAPS
+        for info in self.catalog.get_maps(self.map_sort)[start:start + Menu.MAX_MAPS]:
+            position = position + Vec(0, 40)
+            button = Button(self.btp)
+            button.build("{} ({} tiles)".format(info.name, info.tiles), position, Vec(10, 5), 16)
+            self.map_buttons.append((info.name, button))
+
+        position = Vec(20, 20 + (Menu.MAX_MAPS + 1) * 40)
+        self.btn_previous.build("<", position, Vec(10, 5), 20)
+        self.btn_next.build(">", position + Vec(50, 0), Vec(10, 5), 20)
+
+    def set_map_page(self, page: int):
+        page = min(max(page, 0), self.get_pages() - 1)
+        if page != self.map_page:
+            self.map_page = page
+            self.build_map_list()
+
+    def draw_map_list(self):
+        if self.btn_sort.draw(BLACK, Color(0, 0, 0, 0)):
+            self.map_sort = Menu.SORTS[(Menu.SORTS.index(self.map_sort) + 1) % len(Menu.SORTS)]
+            self.map_page = 0
+            self.build_map_list()
+
+        for name, button in self.map_buttons:
+            bgalpha = 20 if name == self.selected_map else 0
+            if button.draw(BLACK, Color(0, 0, 0, bgalpha)):
+                self.reset_input(name)
+
+        if self.get_pages() > 1:
+            if self.btn_previous.draw(BLACK, Color(0, 0, 0, 0 if self.btn_previous.is_hover() else 20)):
+                self.set_map_page(self.map_page - 1)
+            if self.btn_next.draw(BLACK, Color(0, 0, 0, 0 if self.btn_next.is_hover() else 20)):
+                self.set_map_page(self.map_page + 1)
+
+        wheel = self.btp.wheel
+        if wheel != 0:
+            self.set_map_page(self.map_page + (1 if wheel < 0 else -1))
+
+    def draw_map_preview(self):
+        info = self.catalog.get(self.selected_map)
+        if info is None:
+            return
+
+        width = info.bounds[2] - info.bounds[0] + 1 if info.chunks != 0 else 0
+        height = info.bounds[3] - info.bounds[1] + 1 if info.chunks != 0 else 0
+        self.btp.draw_text("{} chunks ({}x{}), {} tiles, {} entities".format(info.chunks, width, height, info.tiles, info.entities),
+                           self.input_map.position + Vec(0, self.input_map.button.size.y + 10), 20, BLACK)
 
     def reset_input(self, text=""):
         self.input_map.build(text, self.input_map.position,
@@ -49,21 +120,23 @@ class Menu(Screen):
 
         bgalpha = 0 if self.btn_mapcr.is_hover() else 20
         if self.btn_mapcr.draw(BLACK, Color(0, 0, 0, bgalpha)):
-            if os.path.exists(self.selected_map+".dat"):
+            if self.catalog.exists(self.selected_map):
                 self.last_selected = self.selected_map
                 self.reset_input()
             state = DungeonScreens.MAP_CREATOR
 
         bgalpha = 0 if self.btn_select.is_hover() else 20
         if self.btn_select.draw(BLACK, Color(0, 0, 0, bgalpha)):
-            if os.path.exists(self.selected_map+".dat"):
+            if self.catalog.exists(self.selected_map):
                 self.last_selected = self.selected_map
                 state = DungeonScreens.GAME
 
             self.reset_input()
 
         self.selected_map = self.input_map.draw(BLACK)
-        self.btp.draw_text(".dat", self.input_map.position + Vec(self.input_map.button.size.x +
+        self.draw_map_preview()
+        self.draw_map_list()
+        self.btp.draw_text(MapFile.EXTENSION, self.input_map.position + Vec(self.input_map.button.size.x +
                            20, self.input_map.button.size.y/2), self.input_map.button.text.fontsize, BLACK)
 
         self.btp.draw_rect(self.btn_mapcr.position -
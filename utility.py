@@ -27,7 +27,7 @@ class DungeonActionTypes:
 
     @staticmethod
     def all():
-        return [DungeonActionTypes.COLLISION, DungeonActionTypes.COLLISION_IN, DungeonActionTypes.AROUND, DungeonActionTypes.COLLECT]
+        return (DungeonActionTypes.COLLISION, DungeonActionTypes.COLLISION_IN, DungeonActionTypes.AROUND, DungeonActionTypes.COLLECT)
 
 
 class DungeonRoleTypes: